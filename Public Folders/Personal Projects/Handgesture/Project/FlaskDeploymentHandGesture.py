@@ -22,12 +22,21 @@ from flasgger import Swagger
 from flask_cors import CORS
 from datetime import datetime
 import getpass
-
-# Set your ngrok authentication token
-conf.get_default().auth_token = getpass.getpass()
-
-# Load the pre-trained model
-model = load_model('HagridModel1.keras')
+from image_preprocessing import BUFFER_POOL_SIZE, BufferPool, decode_image, is_jpeg, preprocess_image
+from prediction_cache import PredictionCache, frame_hash
+from model_registry import ModelManager, ServedModel, list_versions
+from profiling_hooks import profiled
+
+# Serving configuration, overridable from the environment for local runs and load tests
+MODEL_PATH = os.environ.get("GESTURE_MODEL", "HagridModel1.keras")
+# Model registry: GESTURE_MODEL_VERSION pins a version, otherwise the newest is served and
+# versions published later are picked up every GESTURE_REGISTRY_POLL seconds (0 disables).
+# A version requested through /model/reload stays pinned until a reload without a version.
+REGISTRY_DIR = os.environ.get("GESTURE_REGISTRY")
+SAVE_DIR = os.environ.get("GESTURE_SAVE_DIR", "/Volumes/Datasets/SavedImages")
+USE_TUNNEL = os.environ.get("GESTURE_TUNNEL", "1") == "1"
+# Reduced-resolution JPEG decoding: faster on large frames but changes the model input
+FAST_DECODE = os.environ.get("GESTURE_FAST_DECODE", "0") == "1"
 
 # Enable Flask debug mode
 os.environ["FLASK_DEBUG"] = "1"
@@ -35,67 +44,136 @@ os.environ["FLASK_DEBUG"] = "1"
 app = Flask(__name__)
 swagger = Swagger(app)
 CORS(app)
-port = 5001
-
-# Open a ngrok tunnel to the HTTP server
-public_url = ngrok.connect(port, bind_tls=True).public_url
-print(f" * ngrok tunnel \"{public_url}\" -> \"http://127.0.0.1:{port}\"")
-
-# Update any base URLs to use the public ngrok URL
-app.config["BASE_URL"] = public_url
+port = int(os.environ.get("GESTURE_PORT", "5001"))
+
+if USE_TUNNEL:
+    # Set your ngrok authentication token
+    conf.get_default().auth_token = getpass.getpass()
+
+    # Open a ngrok tunnel to the HTTP server
+    public_url = ngrok.connect(port, bind_tls=True).public_url
+    print(f" * ngrok tunnel \"{public_url}\" -> \"http://127.0.0.1:{port}\"")
+
+    # Update any base URLs to use the public ngrok URL
+    app.config["BASE_URL"] = public_url
+else:
+    app.config["BASE_URL"] = f"http://127.0.0.1:{port}"
+
+# Preallocated preprocessing buffers shared by the request threads
+buffer_pool = BufferPool(int(os.environ.get("GESTURE_BUFFERS", str(BUFFER_POOL_SIZE))))
+
+# Optional near-duplicate frame cache for the capture route
+if os.environ.get("GESTURE_CACHE", "0") == "1":
+    prediction_cache = PredictionCache(
+        max_entries=int(os.environ.get("GESTURE_CACHE_SIZE", "256")),
+        ttl=float(os.environ.get("GESTURE_CACHE_TTL", "2.0")),
+        threshold=int(os.environ.get("GESTURE_CACHE_THRESHOLD", "4")),
+    )
+else:
+    prediction_cache = None
+
+# Labels of the single-file model; registry versions carry their own
+DEFAULT_LABELS = ['Dislike', 'Like', 'Mute', 'OK', 'Stop']
+
+def on_model_swap(served):
+    """
+    Drops cached predictions made by the previous model version.
 
-def preprocess_image(img):
+    Args:
+        served (ServedModel): The newly active model.
     """
-    Preprocesses an input image for model prediction.
+    if prediction_cache is not None:
+        prediction_cache.clear()
+
+# Load the pre-trained model, from the versioned registry when one is configured
+model_manager = ModelManager(REGISTRY_DIR, on_swap=on_model_swap)
+if REGISTRY_DIR:
+    model_manager.activate(os.environ.get("GESTURE_MODEL_VERSION"))
+    watch_interval = float(os.environ.get("GESTURE_REGISTRY_POLL", "10"))
+    if watch_interval > 0:
+        model_manager.watch(watch_interval)
+    if os.environ.get("GESTURE_SHADOW_VERSION"):
+        model_manager.set_candidate(os.environ["GESTURE_SHADOW_VERSION"],
+                                    float(os.environ.get("GESTURE_SHADOW_FRACTION", "0.05")))
+else:
+    model_manager.swap(ServedModel('static', load_model(MODEL_PATH), DEFAULT_LABELS))
+
+@profiled
+def classify_image(img_batch):
+    """
+    Runs the model on a preprocessed image batch.
 
     Args:
-        img (numpy.ndarray): The image to preprocess.
+        img_batch (numpy.ndarray): The preprocessed image batch.
 
     Returns:
         tuple: A tuple containing:
-            - img_batch (tensorflow.Tensor): The preprocessed image ready for prediction.
-            - img_resized (tensorflow.Tensor): The resized image for display.
+            - prediction_label (str): The predicted label.
+            - probabilities (numpy.ndarray): The class probabilities.
     """
-    # Decode the image into a tensor
-    img = tf.convert_to_tensor(img, dtype=tf.float32)
-    img_resized = tf.image.resize(img, [224, 224])
-    # Preprocess the image using MobileNet's preprocessing function
-    img_preprocessed = tf.keras.applications.mobilenet.preprocess_input(img_resized)
-    # Add a batch dimension
-    img_batch = tf.expand_dims(img_preprocessed, axis=0)
+    return model_manager.predict(img_batch)
 
-    return img_batch, img_resized
-
-def predict_model(img_batch, img_resized):
+@profiled
+def render_prediction(img_resized, prediction_label):
     """
-    Performs prediction on the preprocessed image and generates a labeled image.
+    Draws the resized image titled with its predicted label.
 
     Args:
-        img_batch (tensorflow.Tensor): The preprocessed image batch.
-        img_resized (tensorflow.Tensor): The resized image for display.
+        img_resized (numpy.ndarray): The resized uint8 image for display.
+        prediction_label (str): The predicted label.
 
     Returns:
-        tuple: A tuple containing:
-            - prediction_label (str): The predicted label.
-            - image_string (str): The base64-encoded image with the prediction label.
+        str: The base64-encoded PNG image with the prediction label.
     """
-    # Perform the prediction
-    prediction = model.predict(img_batch)
-
     buffer = io.BytesIO()
-    plt.imshow(tf.cast(img_resized, tf.uint8))
-
-    labels = ['Dislike', 'Like', 'Mute', 'OK', 'Stop']
-    prediction_label = labels[prediction.argmax()]
+    plt.imshow(img_resized)
     plt.title(prediction_label)
     plt.axis('off')
     plt.savefig(buffer, format='png')
     plt.close()
     # Encode the image to base64 string
     buffer.seek(0)
-    image_string = base64.b64encode(buffer.read()).decode('utf-8')
+    return base64.b64encode(buffer.read()).decode('utf-8')
+
+@profiled
+def predict_model(img_batch, img_resized):
+    """
+    Performs prediction on the preprocessed image and generates a labeled image.
 
-    return prediction_label, image_string
+    Args:
+        img_batch (numpy.ndarray): The preprocessed image batch.
+        img_resized (numpy.ndarray): The resized uint8 image for display.
+
+    Returns:
+        tuple: A tuple containing:
+            - prediction_label (str): The predicted label.
+            - image_string (str): The base64-encoded image with the prediction label.
+    """
+    prediction_label, _ = classify_image(img_batch)
+    return prediction_label, render_prediction(img_resized, prediction_label)
+
+def save_image(data, img, prefix, prediction_label):
+    """
+    Archives the uploaded image as a JPEG under a filename built from its prediction.
+    JPEG uploads are saved byte for byte; other formats are re-encoded from the
+    decoded image. Nothing is written when the save directory does not exist.
+
+    Args:
+        data (bytes): The encoded image as received from the client.
+        img (numpy.ndarray): The decoded image, used when ``data`` is not a JPEG.
+        prefix (str): The filename prefix identifying the route.
+        prediction_label (str): The predicted label.
+    """
+    if not os.path.isdir(SAVE_DIR):
+        return
+    filename = f"{prefix}_{prediction_label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
+    path = os.path.join(SAVE_DIR, filename)
+    if is_jpeg(data):
+        # Save the bytes as-is, the decoded image may be at reduced resolution
+        with open(path, 'wb') as f:
+            f.write(data)
+    else:
+        cv2.imwrite(path, img)
 
 # Define the prediction route
 @app.route('/', methods=['GET', 'POST'])
@@ -111,21 +189,18 @@ def predict():
         # Get the image from the request
         file = request.files['file']
         # Read the image for processing without saving it first
-        img = cv2.imdecode(np.frombuffer(file.read(), np.uint8), cv2.IMREAD_COLOR)
+        data = file.read()
+        img = decode_image(data, reduced=FAST_DECODE)
 
-        # Preprocess the image
-        img_batch, img_resized = preprocess_image(img)
+        # Preprocess the image into pooled buffers and predict while holding them
+        with buffer_pool.checkout() as buffers:
+            img_batch, img_resized = preprocess_image(img, buffers)
 
-        # Get the prediction name and the prediction image
-        prediction_name, img_prediction = predict_model(img_batch, img_resized)
-
-        # Construct the filename using the prediction name
-        filename = f"Upload_{prediction_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-        path = '/Volumes/Datasets/SavedImages'
-        save_path = os.path.join(path, filename)
+            # Get the prediction name and the prediction image
+            prediction_name, img_prediction = predict_model(img_batch, img_resized)
 
         # Save the image with the prediction name
-        cv2.imwrite(save_path, img)
+        save_image(data, img, 'Upload', prediction_name)
 
         # Prepare the data for displaying in HTML
         chart_url = f"{img_prediction}"
@@ -149,30 +224,117 @@ def capture():
     image_data = data.split(',')[1]  # Strip the data:image/jpeg;base64, header
     decoded_image = base64.b64decode(image_data)
 
-    # Convert to NumPy array and decode
-    npimg = np.frombuffer(decoded_image, np.uint8)
-    img = cv2.imdecode(npimg, cv2.IMREAD_COLOR)
-
-    # Preprocess the image
-    img_batch, img_resized = preprocess_image(img)
-    prediction_name, img_prediction = predict_model(img_batch, img_resized)
-
-    # Construct the filename using the prediction name
-    filename = f"webcam_{prediction_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-    path = '/Volumes/Datasets/SavedImages/'
-    save_path = os.path.join(path, filename)
-    cv2.imwrite(save_path, img)
+    # Decode the frame, at reduced resolution only when fast decoding is enabled
+    img = decode_image(decoded_image, reduced=FAST_DECODE)
+
+    # Preprocess the image into pooled buffers and predict while holding them
+    with buffer_pool.checkout() as buffers:
+        img_batch, img_resized = preprocess_image(img, buffers)
+
+        # Reuse the prediction of a near-identical recent frame when the cache is enabled
+        if prediction_cache is not None:
+            key = frame_hash(img_resized)
+            cached = prediction_cache.lookup(key)
+            if cached is None:
+                prediction_name, probabilities = classify_image(img_batch)
+                prediction_cache.store(key, prediction_name, probabilities)
+            else:
+                prediction_name, probabilities = cached
+        else:
+            prediction_name, probabilities = classify_image(img_batch)
+        img_prediction = render_prediction(img_resized, prediction_name)
+
+    # Save the image with the prediction name
+    save_image(decoded_image, img, 'webcam', prediction_name)
 
     # Prepare the data for returning as JSON
     chart_url = f"{img_prediction}"
 
     return {'chart_url': chart_url}
 
+# Define the cache metrics route
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    """
+    Reports the hit-rate metrics of the capture route's prediction cache.
+
+    Returns:
+        dict: A JSON response with the cache metrics, or ``{'enabled': False}``.
+    """
+    if prediction_cache is None:
+        return {'enabled': False}
+    return {'enabled': True, **prediction_cache.stats()}
+
+# Define the preprocessing buffer metrics route
+@app.route('/buffer_stats', methods=['GET'])
+def buffer_stats():
+    """
+    Reports how often the preprocessing buffers were reused rather than allocated.
+
+    Returns:
+        dict: A JSON response with the buffer pool metrics.
+    """
+    return buffer_pool.stats()
+
+
+# Define the model status and reload routes
+@app.route('/model', methods=['GET'])
+def model_status():
+    """
+    Reports the active and shadow model versions.
+
+    Returns:
+        dict: A JSON response with the serving status.
+    """
+    return model_manager.status()
+
+@app.route('/model/reload', methods=['POST'])
+def model_reload():
+    """
+    Loads and warms up a registry version in the background, then swaps it in.
+    Accepts an optional ``version`` form field (default is the newest version). An
+    explicit version stays pinned: the registry watcher stops advancing to newer
+    versions until a reload without a version.
+
+    Returns:
+        dict: A JSON response acknowledging the reload.
+    """
+    if not REGISTRY_DIR:
+        return {'error': 'No model registry configured'}, 400
+    version = request.form.get('version')
+    if version is not None and version not in list_versions(REGISTRY_DIR):
+        return {'error': f'Unknown model version {version}'}, 404
+    model_manager.reload_async(version)
+    return {'reloading': version or 'latest'}, 202
+
+@app.route('/model/shadow', methods=['POST'])
+def model_shadow():
+    """
+    Sends a fraction of traffic to a candidate version for a shadow comparison.
+    Accepts ``version`` (omit to stop shadowing) and ``fraction`` (between 0 and 1)
+    form fields.
+
+    Returns:
+        dict: A JSON response acknowledging the change.
+    """
+    if not REGISTRY_DIR:
+        return {'error': 'No model registry configured'}, 400
+    version = request.form.get('version')
+    try:
+        fraction = float(request.form.get('fraction', '0.05'))
+    except ValueError:
+        return {'error': 'fraction must be a number'}, 400
+    if not 0.0 <= fraction <= 1.0:
+        return {'error': 'fraction must be between 0 and 1'}, 400
+    if version is not None and version not in list_versions(REGISTRY_DIR):
+        return {'error': f'Unknown model version {version}'}, 404
+    model_manager.set_candidate_async(version, fraction)
+    return {'candidate': version, 'shadow_fraction': fraction}, 202
 
 # Run the Flask app
 if __name__ == '__main__':
     """
-    Starts the Flask application on a separate thread, running on port 5001.
+    Starts the Flask application on a separate thread, running on port 5001 by default.
     """
     threading.Thread(target=app.run, kwargs={
         "host": "0.0.0.0",
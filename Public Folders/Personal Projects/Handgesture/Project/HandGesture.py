@@ -45,9 +45,12 @@ from base64 import b64decode
 import PIL
 import io
 from concurrent.futures import ThreadPoolExecutor
+from model_registry import publish_model
+from profiling_hooks import profiled
 
 # Define functions and model building pipeline
 
+@profiled
 def organize_data(path: str):
     """
     Organize the dataset into training, validation, and testing folders.
@@ -123,6 +126,7 @@ def build_mobilenet_model(num_classes: int):
     
     return model
 
+@profiled
 def compile_and_train(model, train_batches, valid_batches, epochs=30):
     """
     Compile and train the given model on the provided data.
@@ -169,6 +173,21 @@ def save_model(model, model_path: str):
     """
     model.save(model_path)
 
+def register_model(model, registry_dir: str, class_indices: dict):
+    """
+    Publish the trained model as a new version of a model registry for the server.
+    
+    Parameters:
+    model (keras.Model): The model to be published.
+    registry_dir (str): Path to the model registry directory.
+    class_indices (dict): Class name to output index mapping, e.g. ``train_batches.class_indices``.
+    
+    Returns:
+    str: The new version name.
+    """
+    labels = sorted(class_indices, key=class_indices.get)
+    return publish_model(model, registry_dir, labels)
+
 def load_trained_model(model_path: str):
     """
     Load a trained model from the specified path.
@@ -198,6 +217,9 @@ history = compile_and_train(model, train_batches, valid_batches, epochs=30)
 # Save the model
 save_model(model, '/path/to/saved/model')
 
+# Or publish it to the registry the server hot-reloads from
+register_model(model, '/path/to/models', train_batches.class_indices)
+
 # Evaluate the model
 test_accuracy = evaluate_model(model, test_batches)
 print(f"Test accuracy: {test_accuracy}")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+benchmark_cache.py
+Replays a recorded or synthetic webcam stream through the capture route's pipeline and
+the near-duplicate prediction cache. Every frame is also classified fresh as a reference,
+so the report covers inference calls saved, hit rate and how often a cached label
+disagrees with the prediction the frame would have received.
+
+Without a model file a cheap deterministic stand-in classifier is used, which is enough
+to measure hit rates and the hash's sensitivity but not real label disagreement.
+
+Usage:
+    python benchmark_cache.py --video recording.mp4 --model HagridModel1.keras
+    python benchmark_cache.py --frames 600 --threshold 4 --ttl 2.0
+"""
+
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from image_preprocessing import BufferPool, decode_image, preprocess_image
+from prediction_cache import PredictionCache, frame_hash
+
+LABELS = ['Dislike', 'Like', 'Mute', 'OK', 'Stop']
+
+
+def synthetic_stream(frames, fps, hold_seconds=3.0, seed=0):
+    """
+    Generates a webcam-like stream: a hand-sized blob held still for a few seconds,
+    then moved to a new pose, with per-frame sensor noise and slight jitter.
+
+    Args:
+        frames (int): Number of frames.
+        fps (float): Frames per second.
+        hold_seconds (float): How long each pose is held.
+        seed (int): Random seed.
+
+    Yields:
+        tuple: The frame timestamp in seconds and the BGR frame.
+    """
+    rng = np.random.default_rng(seed)
+    height, width = 480, 640
+    background = np.tile(np.linspace(60, 180, width, dtype=np.float32), (height, 1))
+    background = np.dstack([background, background * 0.9, background * 0.8])
+    hold = max(1, int(hold_seconds * fps))
+
+    for i in range(frames):
+        if i % hold == 0:
+            center = (int(rng.integers(150, width - 150)), int(rng.integers(120, height - 120)))
+            axes = (int(rng.integers(40, 120)), int(rng.integers(60, 140)))
+            color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        frame = background + rng.normal(0, 4, background.shape)
+        jitter = (center[0] + int(rng.integers(-2, 3)), center[1] + int(rng.integers(-2, 3)))
+        frame = np.clip(frame, 0, 255).astype(np.uint8)
+        cv2.ellipse(frame, jitter, axes, 0, 0, 360, color, -1)
+        yield i / fps, frame
+
+
+def video_stream(path):
+    """
+    Reads frames from a recorded video.
+
+    Args:
+        path (str): Path to the video file.
+
+    Yields:
+        tuple: The frame timestamp in seconds and the BGR frame.
+    """
+    capture = cv2.VideoCapture(path)
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    i = 0
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        yield i / fps, frame
+        i += 1
+    capture.release()
+
+
+def stand_in_classifier(img_batch):
+    """
+    Deterministic stand-in for the model, mapping the mean colour of the frame to a label.
+
+    Args:
+        img_batch (numpy.ndarray): The preprocessed image batch.
+
+    Returns:
+        numpy.ndarray: Pseudo class probabilities.
+    """
+    logits = np.array([img_batch[0, ..., c].mean() for c in range(3)] + [0.0, 0.0], dtype=np.float32)
+    logits = np.sin(logits * 40.0 + np.arange(5))
+    exp = np.exp(logits - logits.max())
+    return exp / exp.sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--video', help='recorded video to replay instead of a synthetic stream')
+    parser.add_argument('--frames', type=int, default=600, help='synthetic frames to generate')
+    parser.add_argument('--fps', type=float, default=15.0, help='synthetic stream frame rate')
+    parser.add_argument('--model', default='HagridModel1.keras', help='model to classify frames with')
+    parser.add_argument('--size', type=int, default=256, help='cache LRU size')
+    parser.add_argument('--ttl', type=float, default=2.0, help='cache TTL in seconds of stream time')
+    parser.add_argument('--threshold', type=int, default=4, help='maximum Hamming distance for a hit')
+    args = parser.parse_args()
+
+    if os.path.exists(args.model):
+        from tensorflow.keras.models import load_model
+        model = load_model(args.model)
+        classify = lambda batch: model.predict(batch, verbose=0)[0]
+        print(f"Classifying with {args.model}")
+    else:
+        classify = stand_in_classifier
+        print(f"{args.model} not found, classifying with the stand-in classifier")
+
+    # Replay on the stream's own clock so the TTL behaves as it would live
+    clock = [0.0]
+    cache = PredictionCache(max_entries=args.size, ttl=args.ttl, threshold=args.threshold,
+                            clock=lambda: clock[0])
+    stream = video_stream(args.video) if args.video else synthetic_stream(args.frames, args.fps)
+
+    buffers = BufferPool(1).acquire()
+    frames = disagreements = 0
+    max_prob_diff = 0.0
+    inference_seconds = 0.0
+    for timestamp, frame in stream:
+        clock[0] = timestamp
+        data = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+        img_batch, img_resized = preprocess_image(decode_image(data), buffers)
+
+        start = time.perf_counter()
+        fresh = classify(img_batch)
+        inference_seconds += time.perf_counter() - start
+
+        key = frame_hash(img_resized)
+        cached = cache.lookup(key)
+        if cached is None:
+            cache.store(key, LABELS[fresh.argmax()], fresh)
+        else:
+            label, probabilities = cached
+            disagreements += int(label != LABELS[fresh.argmax()])
+            max_prob_diff = max(max_prob_diff, float(np.abs(probabilities - fresh).max()))
+        frames += 1
+
+    stats = cache.stats()
+    mean_inference_ms = inference_seconds * 1000 / max(frames, 1)
+    print(f"Frames replayed:         {frames}")
+    print(f"Inference calls saved:   {stats['hits']} ({stats['hit_rate']:.1%})")
+    print(f"Inference time saved:    {stats['hits'] * mean_inference_ms / 1000:.2f}s "
+          f"at {mean_inference_ms:.2f}ms per call")
+    print(f"Label disagreements:     {disagreements} of {stats['hits']} hits")
+    print(f"Max probability diff:    {max_prob_diff:.4f}")
+    print(f"Expired / evicted:       {stats['expired']} / {stats['evicted']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+benchmark_preprocess.py
+Compares the original TensorFlow preprocessing path with the fused uint8 path in
+image_preprocessing.py, with and without reduced-resolution JPEG decoding. Reports
+per-call time, Python-visible allocations and the largest difference from the original
+model input, and, given a model and a test split, how often the paths agree on the
+prediction.
+
+Usage:
+    python benchmark_preprocess.py --calls 200
+    python benchmark_preprocess.py --test-dir /Volumes/Datasets/Hagrid/hagrid-classification-512p/test \
+        --model HagridModel1.keras
+"""
+
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+import tensorflow as tf
+
+from image_preprocessing import BufferPool, decode_image, preprocess_image
+from synthetic_frames import synthetic_frame
+
+# Frame sizes sent by typical webcams and phone uploads (height, width)
+SYNTHETIC_SIZES = [(480, 640), (720, 1280), (1080, 1920), (3024, 4032)]
+
+# The benchmark is single-threaded, so one pooled buffer pair serves every call
+_buffers = BufferPool(1).acquire()
+
+
+def legacy_preprocess(data):
+    """
+    The original decode and preprocessing path from FlaskDeploymentHandGesture.py.
+
+    Args:
+        data (bytes): The encoded image.
+
+    Returns:
+        tuple: The preprocessed image batch and the resized image.
+    """
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    img = tf.convert_to_tensor(img, dtype=tf.float32)
+    img_resized = tf.image.resize(img, [224, 224])
+    img_preprocessed = tf.keras.applications.mobilenet.preprocess_input(img_resized)
+    img_batch = tf.expand_dims(img_preprocessed, axis=0)
+
+    return img_batch, img_resized
+
+
+def fused_preprocess(data):
+    """
+    The fused uint8 decode and preprocessing path served by default.
+
+    Args:
+        data (bytes): The encoded image.
+
+    Returns:
+        tuple: The preprocessed image batch and the resized image.
+    """
+    return preprocess_image(decode_image(data), _buffers)
+
+
+def reduced_preprocess(data):
+    """
+    The fused path with reduced-resolution JPEG decoding (GESTURE_FAST_DECODE=1).
+
+    Args:
+        data (bytes): The encoded image.
+
+    Returns:
+        tuple: The preprocessed image batch and the resized image.
+    """
+    return preprocess_image(decode_image(data, reduced=True), _buffers)
+
+
+def input_difference(fn, data):
+    """
+    Largest absolute difference between the model input of ``fn`` and the original path.
+
+    Args:
+        fn (callable): The preprocessing function.
+        data (bytes): The encoded image.
+
+    Returns:
+        float: The difference, on MobileNet's [-1, 1] input scale.
+    """
+    legacy_batch, _ = legacy_preprocess(data)
+    batch, _ = fn(data)
+    return float(np.abs(np.asarray(legacy_batch) - batch).max())
+
+
+def time_calls(fn, data, calls):
+    """
+    Measures the mean wall time and mean traced allocation peak of ``fn(data)``.
+
+    tracemalloc only sees allocations made through Python's allocator (NumPy arrays
+    included); memory allocated inside TensorFlow's runtime is not counted.
+
+    Args:
+        fn (callable): The preprocessing function.
+        data (bytes): The encoded image.
+        calls (int): Number of timed calls.
+
+    Returns:
+        tuple: Mean milliseconds per call and mean peak KiB per call.
+    """
+    # Warm up kernels
+    for _ in range(3):
+        fn(data)
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(data)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / calls
+
+    peaks = []
+    tracemalloc.start()
+    for _ in range(min(calls, 20)):
+        tracemalloc.reset_peak()
+        fn(data)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    return elapsed_ms, np.mean(peaks) / 1024
+
+
+def compare_predictions(model_path, test_dir, limit):
+    """
+    Runs both paths over a flow_from_directory style test split and compares predictions.
+
+    Args:
+        model_path (str): Path to the saved Keras model.
+        test_dir (str): Directory with one sub-directory of images per class.
+        limit (int): Maximum number of images per class.
+    """
+    model = tf.keras.models.load_model(model_path)
+    classes = sorted(d for d in os.listdir(test_dir) if os.path.isdir(os.path.join(test_dir, d)))
+
+    paths = {'fused': fused_preprocess, 'reduced': reduced_preprocess}
+    total = legacy_correct = 0
+    agree = dict.fromkeys(paths, 0)
+    correct = dict.fromkeys(paths, 0)
+    max_abs_diff = dict.fromkeys(paths, 0.0)
+    for class_index, name in enumerate(classes):
+        image_paths = sorted(glob.glob(os.path.join(test_dir, name, '*')))[:limit]
+        for image_path in image_paths:
+            with open(image_path, 'rb') as f:
+                data = f.read()
+
+            legacy_batch, _ = legacy_preprocess(data)
+            legacy_probs = model.predict(legacy_batch, verbose=0)[0]
+            total += 1
+            legacy_correct += int(legacy_probs.argmax() == class_index)
+            for key, fn in paths.items():
+                batch, _ = fn(data)
+                probs = model.predict(batch, verbose=0)[0]
+                agree[key] += int(legacy_probs.argmax() == probs.argmax())
+                correct[key] += int(probs.argmax() == class_index)
+                max_abs_diff[key] = max(max_abs_diff[key], float(np.abs(legacy_probs - probs).max()))
+
+    print(f"\nLegacy accuracy on {total} test images: {legacy_correct / total:.4f}")
+    for key in paths:
+        print(f"{key:>7}: agreement {agree[key] / total:.4f}, accuracy {correct[key] / total:.4f}, "
+              f"max probability difference {max_abs_diff[key]:.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=100, help='timed calls per frame size')
+    parser.add_argument('--test-dir', help='test split to compare predictions on')
+    parser.add_argument('--model', default='HagridModel1.keras', help='model used for the prediction comparison')
+    parser.add_argument('--limit', type=int, default=500, help='images per class for the prediction comparison')
+    args = parser.parse_args()
+
+    print(f"{'frame':>11} | {'legacy ms':>9} {'legacy KiB':>10} | {'fused ms':>8} {'fused KiB':>9} "
+          f"{'speedup':>7} {'max diff':>8} | {'reduced ms':>10} {'speedup':>7} {'max diff':>8}")
+    for height, width in SYNTHETIC_SIZES:
+        data = synthetic_frame(height, width)
+        legacy_ms, legacy_kib = time_calls(legacy_preprocess, data, args.calls)
+        fused_ms, fused_kib = time_calls(fused_preprocess, data, args.calls)
+        reduced_ms, _ = time_calls(reduced_preprocess, data, args.calls)
+        print(f"{width:>5}x{height:<5} | {legacy_ms:>9.2f} {legacy_kib:>10.0f} | "
+              f"{fused_ms:>8.2f} {fused_kib:>9.0f} {legacy_ms / fused_ms:>6.1f}x "
+              f"{input_difference(fused_preprocess, data):>8.4f} | "
+              f"{reduced_ms:>10.2f} {legacy_ms / reduced_ms:>6.1f}x "
+              f"{input_difference(reduced_preprocess, data):>8.4f}")
+
+    if args.test_dir:
+        compare_predictions(args.model, args.test_dir, args.limit)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+image_preprocessing.py
+Fused uint8 preprocessing path for the hand gesture server.
+
+Frames are resized to the model input size with the same bilinear sampling as the
+original ``tf.image.resize`` path, but while still in uint8, and scaled with MobileNet's
+``x / 127.5 - 1`` directly into a preallocated float32 batch buffer. Decoding JPEGs at a
+reduced resolution is available as an opt-in fast path; it changes the model input
+noticeably on large frames, so it is off unless the caller asks for it. The buffers come
+from a small fixed pool shared by all request threads: Werkzeug starts a new thread
+per connection, so buffers owned by a thread would be reallocated on every connection.
+"""
+
+import threading
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from profiling_hooks import profiled
+
+# Model input size (height, width)
+IMAGE_SIZE = (224, 224)
+
+# JPEG start-of-frame markers carrying the image dimensions (excludes DHT, JPG and DAC)
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# DCT-domain reduction factors supported by OpenCV's JPEG decoder, largest first
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# Buffer pairs preallocated by default, enough for the requests a Flask server runs at once
+BUFFER_POOL_SIZE = 4
+
+
+def is_jpeg(data):
+    """
+    Checks whether encoded image data is a JPEG.
+
+    Args:
+        data (bytes): The encoded image.
+
+    Returns:
+        bool: True if ``data`` starts with a JPEG start-of-image marker.
+    """
+    return bytes(data[:3]) == b'\xff\xd8\xff'
+
+
+def _jpeg_size(data):
+    """
+    Reads the dimensions of a JPEG image from its header without decoding it.
+
+    Args:
+        data (bytes): The encoded image.
+
+    Returns:
+        tuple: ``(height, width)`` of the image, or None if ``data`` is not a JPEG.
+    """
+    if not is_jpeg(data):
+        return None
+
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        # Fill bytes and standalone markers carry no length field
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            i += 2
+            continue
+        if marker in _SOF_MARKERS:
+            height = int.from_bytes(data[i + 5:i + 7], 'big')
+            width = int.from_bytes(data[i + 7:i + 9], 'big')
+            return height, width
+        i += 2 + int.from_bytes(data[i + 2:i + 4], 'big')
+
+    return None
+
+
+def _reduced_flag(data):
+    """
+    Picks the largest JPEG reduction that still leaves the image at least as large
+    as the model input, so the final resize never upsamples more than the original path.
+
+    Args:
+        data (bytes): The encoded image.
+
+    Returns:
+        int: The ``cv2.imread`` flag to decode with.
+    """
+    size = _jpeg_size(data)
+    if size is None:
+        return cv2.IMREAD_COLOR
+
+    height, width = size
+    for factor, flag in _REDUCED_FLAGS:
+        if height // factor >= IMAGE_SIZE[0] and width // factor >= IMAGE_SIZE[1]:
+            return flag
+
+    return cv2.IMREAD_COLOR
+
+
+@profiled
+def decode_image(data, reduced=False):
+    """
+    Decodes an encoded image.
+
+    Args:
+        data (bytes): The encoded image (JPEG, PNG, ...).
+        reduced (bool): Decode JPEGs at a reduced resolution in the DCT domain when the
+            result is still at least as large as the model input. Faster on large
+            frames, but the model input no longer matches the original preprocessing.
+
+    Returns:
+        numpy.ndarray: The decoded BGR uint8 image, or None if it could not be decoded.
+    """
+    data = bytes(data)
+    flag = _reduced_flag(data) if reduced else cv2.IMREAD_COLOR
+    return cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+
+
+class BufferPool:
+    """
+    A fixed set of preallocated resize and batch buffers shared by all threads.
+
+    Requests check a pair out for as long as they use the preprocessed arrays and
+    return it afterwards. When more requests are in flight than the pool holds, the
+    extra request gets a freshly allocated pair instead of waiting, and the pool keeps
+    at most ``size`` pairs.
+
+    Args:
+        size (int): Number of buffer pairs to preallocate.
+    """
+    def __init__(self, size=BUFFER_POOL_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.allocations = 0
+        self._free = [self._allocate() for _ in range(size)]
+
+    def _allocate(self):
+        """
+        Returns:
+            tuple: A new uint8 resize buffer and float32 batch buffer.
+        """
+        with self._lock:
+            self.allocations += 1
+        return (np.empty((*IMAGE_SIZE, 3), dtype=np.uint8),
+                np.empty((1, *IMAGE_SIZE, 3), dtype=np.float32))
+
+    def acquire(self):
+        """
+        Takes a buffer pair out of the pool, allocating one if the pool is empty.
+
+        Returns:
+            tuple: The uint8 resize buffer and the float32 batch buffer.
+        """
+        with self._lock:
+            self.checkouts += 1
+            if self._free:
+                return self._free.pop()
+        return self._allocate()
+
+    def release(self, buffers):
+        """
+        Returns a buffer pair to the pool, dropping it if the pool is already full.
+
+        Args:
+            buffers (tuple): A pair from acquire().
+        """
+        with self._lock:
+            if len(self._free) < self.size:
+                self._free.append(buffers)
+
+    @contextmanager
+    def checkout(self):
+        """
+        Context manager holding a buffer pair for the duration of the block.
+
+        Yields:
+            tuple: The uint8 resize buffer and the float32 batch buffer.
+        """
+        buffers = self.acquire()
+        try:
+            yield buffers
+        finally:
+            self.release(buffers)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Pool size, free pairs, checkouts and total allocations so far.
+        """
+        with self._lock:
+            return {'size': self.size, 'free': len(self._free),
+                    'checkouts': self.checkouts, 'allocations': self.allocations}
+
+
+@profiled
+def preprocess_image(img, buffers=None):
+    """
+    Preprocesses an input image for model prediction.
+
+    The image is resized in uint8 and scaled into the given buffers, so the returned
+    arrays are only valid while the caller holds them (see BufferPool.checkout).
+
+    Args:
+        img (numpy.ndarray): The uint8 image to preprocess.
+        buffers (tuple): A resize and batch buffer pair from a BufferPool. New arrays
+            are allocated when omitted.
+
+    Returns:
+        tuple: A tuple containing:
+            - img_batch (numpy.ndarray): The preprocessed image ready for prediction.
+            - img_resized (numpy.ndarray): The resized uint8 image for display.
+    """
+    if buffers is None:
+        buffers = (np.empty((*IMAGE_SIZE, 3), dtype=np.uint8),
+                   np.empty((1, *IMAGE_SIZE, 3), dtype=np.float32))
+    resized, batch = buffers
+
+    # Bilinear without antialiasing, the sampling tf.image.resize used in the original path
+    cv2.resize(img, (IMAGE_SIZE[1], IMAGE_SIZE[0]), dst=resized, interpolation=cv2.INTER_LINEAR)
+
+    # MobileNet preprocessing: scale pixels to [-1, 1]
+    np.divide(resized, 127.5, out=batch[0], dtype=np.float32)
+    np.subtract(batch[0], 1.0, out=batch[0])
+
+    return batch, resized
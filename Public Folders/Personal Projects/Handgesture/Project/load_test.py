@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+load_test.py
+Offline load generator for FlaskDeploymentHandGesture.py.
+
+Starts the app locally with the ngrok tunnel disabled (GESTURE_TUNNEL=0) and a small
+stand-in Keras model unless one is given, then sends synthetic JPEG uploads to ``/``
+and base64 frames to ``/capture`` from a pool of closed-loop workers. Throughput,
+p50/p95/p99 latency and error rate per endpoint, plus how many preprocessing buffers
+the server allocated, are printed as JSON so serving changes can be compared from one
+run to the next. No network access is needed.
+
+Usage:
+    python load_test.py --concurrency 8 --duration 30
+    python load_test.py --model HagridModel1.keras --capture-ratio 1.0 --output run.json
+    python load_test.py --url http://127.0.0.1:5001 --concurrency 16
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Puts the Personal Projects folder on the import path for the shared instrumentation package
+import profiling_hooks  # noqa: F401
+from instrumentation.load import free_port, start_server
+from synthetic_frames import synthetic_frame
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def build_stub_model(path):
+    """
+    Saves a tiny model with the gesture model's input and output shapes.
+
+    Args:
+        path (str): Where to save the ``.keras`` file.
+    """
+    import tensorflow as tf
+
+    inputs = tf.keras.Input(shape=(224, 224, 3))
+    x = tf.keras.layers.AveragePooling2D(pool_size=8)(inputs)
+    x = tf.keras.layers.Flatten()(x)
+    outputs = tf.keras.layers.Dense(5, activation='softmax')(x)
+    tf.keras.Model(inputs, outputs).save(path)
+
+
+def upload_request(url, jpeg):
+    """Builds a multipart file upload to ``/``."""
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\n'
+        'Content-Disposition: form-data; name="file"; filename="frame.jpg"\r\n'
+        'Content-Type: image/jpeg\r\n\r\n'
+    ).encode() + jpeg + f'\r\n--{boundary}--\r\n'.encode()
+    return urllib.request.Request(f"{url}/", data=body, method='POST',
+                                  headers={'Content-Type': f'multipart/form-data; boundary={boundary}'})
+
+
+def capture_request(url, jpeg):
+    """Builds a base64 webcam frame post to ``/capture``."""
+    image_base64 = 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode('ascii')
+    body = urllib.parse.urlencode({'image_base64': image_base64}).encode()
+    return urllib.request.Request(f"{url}/capture", data=body, method='POST',
+                                  headers={'Content-Type': 'application/x-www-form-urlencoded'})
+
+
+def send(request, timeout):
+    """
+    Sends one request.
+
+    Returns:
+        tuple: Latency in seconds and whether the request succeeded.
+    """
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            ok = response.status == 200
+    except (urllib.error.URLError, http.client.HTTPException, ConnectionError, socket.timeout):
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def fetch_json(url, timeout):
+    """
+    Fetches a JSON metrics route.
+
+    Returns:
+        dict: The decoded response, or None if the route is unavailable.
+    """
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return json.load(response)
+    except (urllib.error.URLError, http.client.HTTPException, ConnectionError, socket.timeout, ValueError):
+        return None
+
+
+def summarize(samples, elapsed):
+    """
+    Summarizes latency samples for one endpoint.
+
+    Args:
+        samples (list): ``(latency_seconds, ok)`` pairs.
+        elapsed (float): Wall time of the measured run in seconds.
+
+    Returns:
+        dict: Request counts, error rate, throughput and latency percentiles.
+    """
+    if not samples:
+        return {'requests': 0}
+    latencies = np.array([latency for latency, _ in samples]) * 1000
+    errors = sum(1 for _, ok in samples if not ok)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': errors / len(samples),
+        'throughput_rps': len(samples) / elapsed,
+        'latency_ms': {
+            'mean': float(latencies.mean()),
+            'p50': float(p50),
+            'p95': float(p95),
+            'p99': float(p99),
+            'max': float(latencies.max()),
+        },
+    }
+
+
+def run_load(url, frames, concurrency, duration, capture_ratio, timeout, seed=0):
+    """
+    Runs closed-loop workers against the server for a fixed duration.
+
+    Returns:
+        tuple: Samples per endpoint and the elapsed wall time.
+    """
+    samples = {'/': [], '/capture': []}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(worker_id):
+        rng = random.Random(seed + worker_id)
+        while time.monotonic() < deadline:
+            jpeg = rng.choice(frames)
+            if rng.random() < capture_ratio:
+                endpoint, request = '/capture', capture_request(url, jpeg)
+            else:
+                endpoint, request = '/', upload_request(url, jpeg)
+            result = send(request, timeout)
+            with lock:
+                samples[endpoint].append(result)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='target an already running server instead of starting one')
+    parser.add_argument('--model', help='model for the started server (default: a small stand-in model)')
+    parser.add_argument('--concurrency', type=int, default=4, help='number of concurrent clients')
+    parser.add_argument('--duration', type=float, default=20.0, help='measured seconds')
+    parser.add_argument('--warmup', type=int, default=5, help='requests per endpoint before measuring')
+    parser.add_argument('--capture-ratio', type=float, default=0.5, help='fraction of requests sent to /capture')
+    parser.add_argument('--frames', type=int, default=16, help='distinct synthetic frames')
+    parser.add_argument('--width', type=int, default=640, help='synthetic frame width')
+    parser.add_argument('--height', type=int, default=480, help='synthetic frame height')
+    parser.add_argument('--timeout', type=float, default=30.0, help='per-request timeout in seconds')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='extra environment for the started server, e.g. GESTURE_CACHE=1')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    frames = [synthetic_frame(args.height, args.width, seed) for seed in range(args.frames)]
+    process = None
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            url = args.url.rstrip('/')
+        else:
+            model_path = args.model
+            if model_path is None:
+                model_path = os.path.join(tmp, 'stub_model.keras')
+                build_stub_model(model_path)
+            port = free_port()
+            env = dict(os.environ, GESTURE_TUNNEL='0', GESTURE_MODEL=os.path.abspath(model_path),
+                       GESTURE_PORT=str(port), GESTURE_SAVE_DIR='',
+                       **dict(item.split('=', 1) for item in args.env))
+            process = start_server([sys.executable, 'FlaskDeploymentHandGesture.py'], port, APP_DIR, env)
+            url = f"http://127.0.0.1:{port}"
+
+        try:
+            for _ in range(args.warmup):
+                send(upload_request(url, frames[0]), args.timeout)
+                send(capture_request(url, frames[0]), args.timeout)
+
+            samples, elapsed = run_load(url, frames, args.concurrency, args.duration,
+                                        args.capture_ratio, args.timeout)
+            buffers = fetch_json(f"{url}/buffer_stats", args.timeout)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    report = {
+        'config': {
+            'url': args.url,
+            'model': args.model or 'stub',
+            'concurrency': args.concurrency,
+            'duration_s': args.duration,
+            'capture_ratio': args.capture_ratio,
+            'frame_size': [args.width, args.height],
+            'env': args.env,
+        },
+        'overall': summarize(samples['/'] + samples['/capture'], elapsed),
+        'endpoints': {endpoint: summarize(results, elapsed) for endpoint, results in samples.items()},
+        'buffers': buffers,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
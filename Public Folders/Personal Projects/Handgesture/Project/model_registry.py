@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+model_registry.py
+Versioned model registry and hot reloading for the hand gesture server.
+
+A registry is a directory of versions, each holding the saved model next to its label
+metadata::
+
+    models/
+        v0001/model.keras
+        v0001/metadata.json   {"version": "v0001", "labels": [...], "created": "..."}
+        v0002/...
+
+Versions are written to a hidden temporary directory and renamed into place, so a
+reader never sees a half-written version. :class:`ModelManager` loads and warms up a
+version off the request path and swaps it in with a single reference assignment;
+requests already running keep the model they started with. A candidate version can
+receive a small fraction of traffic in the background for a shadow comparison.
+"""
+
+import json
+import os
+import random
+import shutil
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from tensorflow.keras.models import load_model
+
+MODEL_FILE = 'model.keras'
+METADATA_FILE = 'metadata.json'
+
+ServedModel = namedtuple('ServedModel', ['version', 'model', 'labels'])
+
+
+def list_versions(registry_dir):
+    """
+    Lists the complete versions in a registry, oldest first.
+
+    Args:
+        registry_dir (str): Path to the registry directory.
+
+    Returns:
+        list: The version names.
+    """
+    if not os.path.isdir(registry_dir):
+        return []
+    versions = [
+        name for name in os.listdir(registry_dir)
+        if not name.startswith('.') and os.path.isfile(os.path.join(registry_dir, name, METADATA_FILE))
+    ]
+    return sorted(versions)
+
+
+def latest_version(registry_dir):
+    """
+    Returns the newest version in a registry, or None if it is empty.
+
+    Args:
+        registry_dir (str): Path to the registry directory.
+    """
+    versions = list_versions(registry_dir)
+    return versions[-1] if versions else None
+
+
+def publish_model(model, registry_dir, labels):
+    """
+    Saves a model with its labels as the next version of a registry.
+
+    Args:
+        model (keras.Model): The trained model.
+        registry_dir (str): Path to the registry directory.
+        labels (list): Class names in the order of the model's outputs.
+
+    Returns:
+        str: The new version name.
+    """
+    os.makedirs(registry_dir, exist_ok=True)
+    staging_dir = os.path.join(registry_dir, f'.tmp-{uuid.uuid4().hex}')
+    os.mkdir(staging_dir)
+    try:
+        model.save(os.path.join(staging_dir, MODEL_FILE))
+
+        existing = list_versions(registry_dir)
+        number = int(existing[-1][1:]) + 1 if existing else 1
+        version = f'v{number:04d}'
+        metadata = {'version': version, 'labels': list(labels), 'created': datetime.now().isoformat()}
+        with open(os.path.join(staging_dir, METADATA_FILE), 'w') as f:
+            json.dump(metadata, f, indent=2)
+
+        os.rename(staging_dir, os.path.join(registry_dir, version))
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    return version
+
+
+def load_version(registry_dir, version=None):
+    """
+    Loads a version of a registry with its labels.
+
+    Args:
+        registry_dir (str): Path to the registry directory.
+        version (str, optional): The version to load (default is the newest).
+
+    Returns:
+        ServedModel: The loaded model, its version and labels.
+    """
+    version = version or latest_version(registry_dir)
+    if version is None:
+        raise FileNotFoundError(f"No model versions found in {registry_dir}")
+
+    version_dir = os.path.join(registry_dir, version)
+    with open(os.path.join(version_dir, METADATA_FILE)) as f:
+        metadata = json.load(f)
+
+    return ServedModel(version, load_model(os.path.join(version_dir, MODEL_FILE)), metadata['labels'])
+
+
+def warm_up(served, input_shape=(1, 224, 224, 3)):
+    """
+    Runs one prediction so graph tracing and allocation happen before serving traffic.
+
+    Args:
+        served (ServedModel): The model to warm up.
+        input_shape (tuple): Shape of the warm-up batch.
+    """
+    served.model.predict(np.zeros(input_shape, dtype=np.float32), verbose=0)
+
+
+class ModelManager:
+    """
+    Holds the active model and swaps in new versions without interrupting requests.
+
+    Args:
+        registry_dir (str, optional): The registry to load versions from.
+        on_swap (callable, optional): Called with the new ServedModel after each swap.
+        max_pending_shadow (int): Most mirrored requests waiting for the candidate at
+            once; further requests are not mirrored until one finishes.
+    """
+
+    def __init__(self, registry_dir=None, on_swap=None, max_pending_shadow=1):
+        self.registry_dir = registry_dir
+        self.on_swap = on_swap
+        self.active = None
+        # Version explicitly asked for, the watcher leaves the active model alone while set
+        self.pinned = None
+        self.candidate = None
+        self.shadow_fraction = 0.0
+        self._reload_lock = threading.Lock()
+        self._shadow_executor = ThreadPoolExecutor(max_workers=1)
+        # Bounds the executor queue, each pending comparison holds a copy of its batch
+        self._shadow_slots = threading.BoundedSemaphore(max_pending_shadow)
+        self._stats_lock = threading.Lock()
+        self.shadow_stats = {'compared': 0, 'agreed': 0, 'skipped': 0, 'errors': 0}
+
+    def swap(self, served):
+        """
+        Warms up a loaded model and makes it the active one.
+
+        Args:
+            served (ServedModel): The model to serve.
+        """
+        warm_up(served)
+        self.active = served
+        if self.on_swap is not None:
+            self.on_swap(served)
+        print(f" * Serving model version {served.version}")
+
+    def activate(self, version=None):
+        """
+        Loads, warms up and activates a registry version unless it is already active.
+
+        Activating an explicit version pins it, so watch() no longer advances to newer
+        versions; activating the newest version (no ``version``) clears the pin.
+
+        Args:
+            version (str, optional): The version to activate (default is the newest).
+        """
+        with self._reload_lock:
+            self._load(version or latest_version(self.registry_dir))
+            self.pinned = version
+
+    def _load(self, version):
+        """Swaps in a version unless it is already active. Called with the reload lock held."""
+        if self.active is not None and self.active.version == version:
+            return
+        self.swap(load_version(self.registry_dir, version))
+
+    def _activate_logged(self, version):
+        """Activates a version from a background thread, reporting failures instead of raising."""
+        try:
+            self.activate(version)
+        except Exception as e:
+            print(f"Error loading model version {version or 'latest'}: {e}")
+
+    def reload_async(self, version=None):
+        """
+        Activates a registry version in a background thread.
+
+        Args:
+            version (str, optional): The version to activate (default is the newest).
+        """
+        threading.Thread(target=self._activate_logged, args=(version,), daemon=True).start()
+
+    def _advance(self, version):
+        """Activates a newly published version unless a version is pinned."""
+        with self._reload_lock:
+            if self.pinned is None:
+                self._load(version)
+
+    def watch(self, interval=10.0):
+        """
+        Polls the registry in a background thread and activates new versions as they appear.
+
+        Only a version newer than any seen before is activated, so a rollback to an
+        older version stays in place, and nothing is activated while a version is
+        pinned through activate().
+
+        Args:
+            interval (float): Seconds between polls.
+        """
+        def poll():
+            seen = latest_version(self.registry_dir)
+            while True:
+                time.sleep(interval)
+                newest = latest_version(self.registry_dir)
+                if newest is None or newest == seen:
+                    continue
+                seen = newest
+                try:
+                    self._advance(newest)
+                except Exception as e:
+                    print(f"Error loading model version {newest}: {e}")
+
+        threading.Thread(target=poll, daemon=True).start()
+
+    def set_candidate(self, version, fraction):
+        """
+        Loads a registry version as the shadow candidate and starts mirroring traffic to it.
+
+        Args:
+            version (str): The candidate version, or None to stop shadowing.
+            fraction (float): Fraction of requests also sent to the candidate, in [0, 1].
+
+        Raises:
+            ValueError: If ``fraction`` is outside [0, 1].
+        """
+        if not 0.0 <= fraction <= 1.0:
+            raise ValueError(f"Shadow fraction must be between 0 and 1, got {fraction}")
+        # Serialized with activations so concurrent calls never leave a mixed state
+        with self._reload_lock:
+            candidate = None
+            if version is not None:
+                candidate = load_version(self.registry_dir, version)
+                warm_up(candidate)
+            with self._stats_lock:
+                self.candidate = candidate
+                self.shadow_fraction = fraction
+                self.shadow_stats = {'compared': 0, 'agreed': 0, 'skipped': 0, 'errors': 0}
+
+    def _set_candidate_logged(self, version, fraction):
+        """Sets the candidate from a background thread, reporting failures instead of raising."""
+        try:
+            self.set_candidate(version, fraction)
+        except Exception as e:
+            print(f"Error loading shadow model version {version}: {e}")
+
+    def set_candidate_async(self, version, fraction):
+        """
+        Loads and sets the shadow candidate in a background thread.
+
+        Args:
+            version (str): The candidate version, or None to stop shadowing.
+            fraction (float): Fraction of requests also sent to the candidate, in [0, 1].
+        """
+        threading.Thread(target=self._set_candidate_logged, args=(version, fraction), daemon=True).start()
+
+    def _compare(self, candidate, img_batch, label):
+        """Runs the candidate on a mirrored request and records whether it agrees."""
+        try:
+            probabilities = candidate.model.predict(img_batch, verbose=0)[0]
+            with self._stats_lock:
+                self.shadow_stats['compared'] += 1
+                self.shadow_stats['agreed'] += int(candidate.labels[probabilities.argmax()] == label)
+        except Exception as e:
+            print(f"Error in shadow comparison with version {candidate.version}: {e}")
+            with self._stats_lock:
+                self.shadow_stats['errors'] += 1
+        finally:
+            self._shadow_slots.release()
+
+    def predict(self, img_batch):
+        """
+        Classifies a preprocessed batch with the active model, mirroring it to the
+        candidate for a fraction of requests.
+
+        Args:
+            img_batch (numpy.ndarray): The preprocessed image batch.
+
+        Returns:
+            tuple: The predicted label and the class probabilities.
+        """
+        # Take one reference so a concurrent swap cannot mix models within a request
+        served = self.active
+        probabilities = served.model.predict(img_batch, verbose=0)[0]
+        label = served.labels[probabilities.argmax()]
+
+        candidate = self.candidate
+        if candidate is not None and random.random() < self.shadow_fraction:
+            if self._shadow_slots.acquire(blocking=False):
+                # Copy because the pooled batch buffer is reused once this request returns
+                self._shadow_executor.submit(self._compare, candidate, np.array(img_batch), label)
+            else:
+                # The candidate is still busy, skip rather than queue another batch copy
+                with self._stats_lock:
+                    self.shadow_stats['skipped'] += 1
+
+        return label, probabilities
+
+    def status(self):
+        """
+        Reports the active and candidate versions and the shadow comparison results.
+
+        Returns:
+            dict: The serving status.
+        """
+        with self._stats_lock:
+            stats = dict(self.shadow_stats)
+        compared = stats['compared']
+        return {
+            'active': self.active.version if self.active is not None else None,
+            'pinned': self.pinned,
+            'labels': self.active.labels if self.active is not None else None,
+            'candidate': self.candidate.version if self.candidate is not None else None,
+            'shadow_fraction': self.shadow_fraction,
+            'shadow_compared': compared,
+            'shadow_skipped': stats['skipped'],
+            'shadow_errors': stats['errors'],
+            'shadow_agreement': stats['agreed'] / compared if compared else None,
+            'available': list_versions(self.registry_dir) if self.registry_dir else [],
+        }
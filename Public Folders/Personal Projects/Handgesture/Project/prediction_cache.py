@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+prediction_cache.py
+Near-duplicate frame cache for the hand gesture server.
+
+Webcam clients send long runs of almost identical frames. Each frame is reduced to a
+64-bit difference hash (dHash) of a tiny grayscale thumbnail, and a frame whose hash is
+within a Hamming distance threshold of a recent frame reuses that frame's label and
+probabilities instead of running the model. Entries are bounded by LRU size and by age.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# dHash compares horizontally adjacent pixels of a (HASH_SIZE + 1) x HASH_SIZE thumbnail
+HASH_SIZE = 8
+
+
+def frame_hash(img):
+    """
+    Computes the 64-bit difference hash of an image.
+
+    Args:
+        img (numpy.ndarray): A BGR uint8 image, ideally already downscaled.
+
+    Returns:
+        int: The perceptual hash of the image.
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    thumb = cv2.resize(gray, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU and TTL bounded cache of predictions keyed by frame hash.
+
+    Args:
+        max_entries (int): Maximum number of cached frames.
+        ttl (float): Seconds after which an entry is no longer reused.
+        threshold (int): Maximum Hamming distance between hashes for a hit; 0 only
+            reuses identical hashes.
+        clock (callable): Returns the current time in seconds; replays pass their own.
+    """
+
+    def __init__(self, max_entries=256, ttl=2.0, threshold=4, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def _find(self, key, now):
+        """Returns the freshest live key matching ``key`` and drops expired entries."""
+        for stale in [k for k, (_, _, stored) in self._entries.items() if now - stored > self.ttl]:
+            del self._entries[stale]
+            self.expired += 1
+
+        if key in self._entries:
+            return key
+        if self.threshold > 0:
+            # Most recently used entries last, so the newest close match wins
+            for candidate in reversed(self._entries):
+                if bin(candidate ^ key).count('1') <= self.threshold:
+                    return candidate
+        return None
+
+    def lookup(self, key):
+        """
+        Looks up a prediction for a frame hash.
+
+        Args:
+            key (int): The frame hash from :func:`frame_hash`.
+
+        Returns:
+            tuple: The cached ``(label, probabilities)``, or None on a miss.
+        """
+        with self._lock:
+            match = self._find(key, self.clock())
+            if match is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(match)
+            self.hits += 1
+            label, probabilities, _ = self._entries[match]
+            return label, probabilities
+
+    def store(self, key, label, probabilities):
+        """
+        Stores the prediction for a frame hash, evicting the least recently used entry when full.
+
+        Args:
+            key (int): The frame hash from :func:`frame_hash`.
+            label (str): The predicted label.
+            probabilities (numpy.ndarray): The class probabilities.
+        """
+        with self._lock:
+            self._entries[key] = (label, probabilities, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+    def clear(self):
+        """Drops every cached prediction, e.g. after the served model changes."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Reports the cache hit-rate metrics.
+
+        Returns:
+            dict: Hits, misses, hit rate, expirations, evictions and current size.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'expired': self.expired,
+                'evicted': self.evicted,
+                'size': len(self._entries),
+            }
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+profiling_hooks.py
+Imports the shared profiling hooks for the hand gesture modules.
+
+Puts the Personal Projects folder two levels up on the import path so the
+instrumentation package is found when running from this folder; see
+instrumentation/__init__.py. The Docker image only copies this folder, so there the
+package is missing and the hooks are no-ops.
+"""
+
+import os
+import sys
+
+PROJECTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECTS_DIR not in sys.path:
+    sys.path.append(PROJECTS_DIR)
+
+try:
+    from instrumentation import profiled
+except ImportError:
+    if os.environ.get('PROFILE_TRACE'):
+        print("PROFILE_TRACE is set but the instrumentation package is not installed; "
+              "no trace will be written", file=sys.stderr)
+
+    def profiled(name=None, category=None):
+        """
+        No-op stand-in for instrumentation.profiled.
+        """
+        return name if callable(name) else (lambda fn: fn)
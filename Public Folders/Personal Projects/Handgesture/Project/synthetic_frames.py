@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+synthetic_frames.py
+Synthetic camera frames shared by the preprocessing benchmark and the load generator.
+"""
+
+import cv2
+import numpy as np
+
+
+def synthetic_frame(height, width, seed=0):
+    """
+    Builds a smooth random JPEG frame so the codec sees realistic content.
+
+    Args:
+        height (int): Frame height.
+        width (int): Frame width.
+        seed (int): Random seed.
+
+    Returns:
+        bytes: The JPEG-encoded frame.
+    """
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, size=(height // 16 + 1, width // 16 + 1, 3), dtype=np.uint8)
+    frame = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+    return cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
@@ -11,6 +11,8 @@ import json
 import os
 from datetime import datetime
 
+from profiling_hooks import profiled
+
 # Constants
 TRAINING_THRESHOLD = 50  # Number of new applications before retraining
 MODEL_DIR = "models"
@@ -30,6 +32,7 @@ def preprocess_salary(salary):
     numbers = [float(num.replace(',', '')) for num in numbers]
     return sum(numbers) / len(numbers)
 
+@profiled
 def preprocess_data(df):
     """Preprocess the data for model training."""
     # Combine text features
@@ -61,6 +64,7 @@ def save_training_info(count):
     with open(os.path.join(MODEL_DIR, 'training_info.json'), 'w') as f:
         json.dump(info, f)
 
+@profiled
 def train_model(applications):
     """Train the status prediction model."""
     if not applications:
@@ -124,6 +128,7 @@ def should_retrain(applications):
             (current_count >= TRAINING_THRESHOLD and 
              current_count - last_count >= TRAINING_THRESHOLD))
 
+@profiled
 def predict_status(company, position, location, salary, applied_date):
     """Predict status for a new job application."""
     try:
@@ -0,0 +1,15 @@
+"""Shared profiling hooks for predict_status.py.
+
+Puts the Personal Projects folder two levels up on the import path so the
+instrumentation package is found when running from this folder; see
+instrumentation/__init__.py.
+"""
+
+import os
+import sys
+
+PROJECTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECTS_DIR not in sys.path:
+    sys.path.append(PROJECTS_DIR)
+
+from instrumentation import profiled  # noqa: E402
@@ -0,0 +1,83 @@
+import argparse
+import random
+import string
+import time
+
+import numpy as np
+
+from preprocessing import Vocabulary, stem, bag_of_words
+
+
+def original_bag_of_words(tokenized_sentence, words):
+    """
+    The original list-scanning bag_of_words, kept as the reference
+    """
+    sentence_words = [stem(word) for word in tokenized_sentence]
+    bag = np.zeros(len(words), dtype=np.float32)
+    for idx, w in enumerate(words):
+        if w in sentence_words:
+            bag[idx] = 1
+    return bag
+
+
+def synthetic_corpus(vocab_size, n_sentences, sentence_length, seed=0):
+    """
+    Random lowercase words as the vocabulary, and sentences drawing mostly
+    from it with some unknown words mixed in
+    """
+    rng = random.Random(seed)
+    raw = set()
+    while len(raw) < vocab_size:
+        raw.add(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))))
+    raw = sorted(raw)
+    all_words = sorted({stem(w) for w in raw})
+
+    sentences = []
+    for _ in range(n_sentences):
+        sentence = [rng.choice(raw) if rng.random() < 0.8 else 'unknownword' for _ in range(sentence_length)]
+        sentences.append(sentence)
+    return all_words, sentences
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bag_of_words against the indexed Vocabulary")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000], help='vocabulary sizes')
+    parser.add_argument('--sentences', type=int, default=200, help='sentences per size')
+    parser.add_argument('--length', type=int, default=8, help='words per sentence')
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        all_words, sentences = synthetic_corpus(size, args.sentences, args.length)
+
+        expected, t_original = timed(lambda: np.array([original_bag_of_words(s, all_words) for s in sentences]))
+        current, t_current = timed(lambda: np.array([bag_of_words(s, all_words) for s in sentences]))
+        vocab, t_build = timed(lambda: Vocabulary(all_words))
+        single, t_single = timed(lambda: np.array([vocab.bag_of_words(s) for s in sentences]))
+        dense, t_dense = timed(lambda: vocab.transform(sentences))
+        sparse_ok = True
+        try:
+            sparse, t_sparse = timed(lambda: vocab.transform(sentences, sparse=True))
+            sparse_ok = np.array_equal(sparse.toarray(), expected)
+        except ImportError:
+            t_sparse = float('nan')
+
+        identical = (np.array_equal(current, expected) and np.array_equal(single, expected)
+                     and np.array_equal(dense, expected) and sparse_ok)
+        per = 1000 / len(sentences)
+        print(f"vocab {len(all_words):>6} words | identical={identical}")
+        print(f"  original loop       {t_original * per:9.3f} ms/sentence")
+        print(f"  bag_of_words (set)  {t_current * per:9.3f} ms/sentence")
+        print(f"  Vocabulary build    {t_build * 1000:9.3f} ms")
+        print(f"  Vocabulary single   {t_single * per:9.3f} ms/sentence")
+        print(f"  Vocabulary dense    {t_dense * per:9.3f} ms/sentence")
+        print(f"  Vocabulary sparse   {t_sparse * per:9.3f} ms/sentence")
+
+
+if __name__ == '__main__':
+    main()
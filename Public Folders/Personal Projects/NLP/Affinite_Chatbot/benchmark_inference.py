@@ -0,0 +1,92 @@
+import argparse
+import json
+import random
+import time
+
+import torch
+
+from inference import ChatEngine
+from model import NeuralNet
+from preprocessing import bag_of_words, fast_tokenize, tokenize
+
+TOKENIZERS = {'nltk': tokenize, 'fast': fast_tokenize}
+
+
+def notebook_loop(sentences, data, intents, tokenizer):
+    """
+    The per-sentence loop from chat.ipynb, without input() and print()
+    """
+    model = NeuralNet(data['input_size'], data['hidden_size'], data['output_size'])
+    model.load_state_dict(data['model_state'])
+    model.eval()
+    all_words, tags = data['all_word'], data['tags']
+
+    responses = []
+    for sentence in sentences:
+        sentence = tokenizer(sentence)
+        X = bag_of_words(sentence, all_words)
+        X = X.reshape(1, X.shape[0])
+        X = torch.from_numpy(X)
+
+        output = model(X)
+        _, predicted = torch.max(output, dim=1)
+        tag = tags[predicted.item()]
+        probs = torch.softmax(output, dim=1)
+        prob = probs[0][predicted.item()]
+
+        response = "I do not understand..."
+        if prob.item() > 0.75:
+            for intent in intents['intents']:
+                if tag == intent['tag']:
+                    response = random.choice(intent['responses'])
+        responses.append(response)
+    return responses
+
+
+def timed(fn, n):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return n / elapsed, elapsed * 1e6 / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ChatEngine against the chat.ipynb loop")
+    parser.add_argument('--sentences', type=int, default=5000, help='number of sentences to answer')
+    parser.add_argument('--batch-size', type=int, default=256, help='predict_many batch size')
+    parser.add_argument('--threads', type=int, default=1, help='torch intra-op threads for the engine')
+    parser.add_argument('--tokenizer', choices=sorted(TOKENIZERS), default='nltk')
+    args = parser.parse_args()
+
+    tokenizer = TOKENIZERS[args.tokenizer]
+    with open('intents.json', 'r') as f:
+        intents = json.load(f)
+    patterns = [p for intent in intents['intents'] for p in intent['patterns']]
+    rng = random.Random(0)
+    sentences = [rng.choice(patterns) for _ in range(args.sentences)]
+    data = torch.load('data.pth')
+
+    n = len(sentences)
+    rate, us = timed(lambda: notebook_loop(sentences, data, intents, tokenizer), n)
+    print(f"{'notebook loop':<28} {rate:>10.0f} sentences/s {us:>9.1f} us/sentence")
+
+    reference = ChatEngine(tokenizer=tokenizer)
+    expected = [reference.predict(s)[0] for s in sentences[:200]]
+    for jit in (None, 'script', 'trace'):
+        engine = ChatEngine(num_threads=args.threads, jit=jit, tokenizer=tokenizer)
+        # Batched, compiled classification must match the eager single-sentence model
+        assert [t for t, _ in engine.predict_many(sentences[:200])] == expected
+        label = f"jit={jit}"
+
+        rate, us = timed(lambda: [engine.respond(s) for s in sentences], n)
+        print(f"{label + ' single':<28} {rate:>10.0f} sentences/s {us:>9.1f} us/sentence")
+
+        def batched():
+            for i in range(0, n, args.batch_size):
+                engine.respond_many(sentences[i:i + args.batch_size])
+        rate, us = timed(batched, n)
+        print(f"{label + f' batch={args.batch_size}':<28} {rate:>10.0f} sentences/s {us:>9.1f} us/sentence")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import random
+import string
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import torch
+
+from intent_index import IntentIndex, iter_intents
+from model import NeuralNet, to_sparse_tensor
+from preprocessing import Vocabulary, fast_tokenize
+
+
+def write_catalog(path, n_intents, patterns_per_intent, vocab_size, seed=0):
+    """
+    Write a synthetic intents.json: every intent draws its patterns from a
+    small topic of its own plus words shared by all intents
+    """
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < vocab_size:
+        words.add(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))))
+    words = sorted(words)
+    common = words[:200]
+
+    with open(path, 'w') as f:
+        f.write('{"intents": [\n')
+        for i in range(n_intents):
+            topic = rng.sample(words, 6)
+            patterns = [' '.join(rng.sample(topic, 3) + rng.sample(common, 2)) + '?'
+                        for _ in range(patterns_per_intent)]
+            intent = {'tag': f'intent-{i}', 'patterns': patterns, 'responses': [f'response {i}']}
+            f.write(('    ' if i == 0 else ',\n    ') + json.dumps(intent))
+        f.write('\n]}\n')
+
+
+def measured(fn):
+    """
+    Run fn, returns (result, seconds, peak traced MiB)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def perturb(pattern, rng):
+    """
+    Drop one word and shuffle the rest, so queries are not exact patterns
+    """
+    tokens = fast_tokenize(pattern)
+    tokens.pop(rng.randrange(len(tokens)))
+    rng.shuffle(tokens)
+    return tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chatbot pipeline on a large synthetic intents catalog")
+    parser.add_argument('--intents', type=int, default=20000)
+    parser.add_argument('--patterns', type=int, default=15, help='patterns per intent')
+    parser.add_argument('--vocab-size', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--k', type=int, default=10, help='shortlist size')
+    parser.add_argument('--batch-size', type=int, default=256)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'intents.json')
+        write_catalog(path, args.intents, args.patterns, args.vocab_size)
+        print(f"catalog: {args.intents} intents x {args.patterns} patterns, "
+              f"{os.path.getsize(path) / 2 ** 20:.1f} MiB on disk")
+
+        def load_all():
+            with open(path, 'r') as f:
+                return json.load(f)
+
+        intents, t_load, m_load = measured(load_all)
+        _, t_stream, m_stream = measured(lambda: sum(len(i['patterns']) for i in iter_intents(path)))
+        print(f"  json.load            {t_load:8.2f} s  peak {m_load:8.1f} MiB")
+        print(f"  iter_intents         {t_stream:8.2f} s  peak {m_stream:8.1f} MiB")
+
+        index, t_build, m_build = measured(lambda: IntentIndex.build(iter_intents(path), tokenizer=fast_tokenize))
+        print(f"  IntentIndex.build    {t_build:8.2f} s  peak {m_build:8.1f} MiB, "
+              f"index {index.memory_bytes() / 2 ** 20:.1f} MiB, {len(index.vocab)} stems")
+
+    # Query latency and shortlist recall on perturbed patterns
+    samples = [rng.choice(intents['intents']) for _ in range(args.queries)]
+    queries = [(intent['tag'], perturb(rng.choice(intent['patterns']), rng)) for intent in samples]
+    index.search(queries[0][1], args.k)
+    latencies = []
+    top1 = topk = 0
+    for tag, tokens in queries:
+        start = time.perf_counter()
+        hits = index.search(tokens, args.k)
+        latencies.append(time.perf_counter() - start)
+        ranked = [t for t, _ in hits]
+        top1 += bool(ranked) and ranked[0] == tag
+        topk += tag in ranked
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+    print(f"  search k={args.k:<3}        p50 {p50:.3f} ms  p99 {p99:.3f} ms  "
+          f"top-1 {top1 / len(queries):.3f}  top-{args.k} {topk / len(queries):.3f}")
+
+    # Dense against sparse model input for one batch over the full vocabulary
+    all_words = sorted(index.vocab)
+    vocab = Vocabulary(all_words)
+    batch = [tokens for _, tokens in queries[:args.batch_size]]
+    dense, _, m_dense = measured(lambda: vocab.transform(batch))
+    sparse, _, m_sparse = measured(lambda: vocab.transform(batch, sparse=True))
+    print(f"  batch of {len(batch)}: dense {m_dense:.1f} MiB, sparse {m_sparse:.2f} MiB "
+          f"({sparse.nnz} non-zeros over {len(all_words)} words)")
+
+    model = NeuralNet(len(all_words), 8, len(index.tags)).eval()
+    X_dense = torch.from_numpy(dense)
+    X_sparse = to_sparse_tensor(sparse)
+    with torch.inference_mode():
+        same = torch.allclose(model(X_dense), model.forward_sparse(X_sparse), atol=1e-5)
+        for name, fn in (('dense', lambda: model(X_dense)), ('sparse', lambda: model.forward_sparse(X_sparse))):
+            fn()
+            start = time.perf_counter()
+            for _ in range(20):
+                fn()
+            print(f"  forward {name:<6}       {(time.perf_counter() - start) / 20 * 1000:8.2f} ms/batch")
+    print(f"  dense and sparse outputs match: {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Each snippet runs in a fresh interpreter and prints its timings as JSON
+ORIGINAL_IMPORT = """
+import time
+start = time.perf_counter()
+import nltk
+from nltk.stem.porter import PorterStemmer
+import numpy as np
+try:
+    nltk.download('punkt')
+    nltk.download('punkt_tab')
+except Exception:
+    pass
+print(json.dumps({'import_s': time.perf_counter() - start}))
+"""
+
+CURRENT = """
+import time
+start = time.perf_counter()
+import preprocessing
+imported = time.perf_counter()
+from inference import ChatEngine
+engine = ChatEngine()
+loaded = time.perf_counter()
+engine.respond("Hi there, what features do you have?")
+first = time.perf_counter()
+engine.respond("How much does premium cost?")
+second = time.perf_counter()
+print(json.dumps({'import_s': imported - start, 'engine_load_s': loaded - imported,
+                  'first_response_s': first - loaded, 'second_response_s': second - first}))
+"""
+
+
+def run(snippet, env):
+    result = subprocess.run([sys.executable, '-c', 'import json\n' + snippet], cwd=HERE,
+                            env=dict(os.environ, **env), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure preprocessing import time and first-response latency")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    cases = [
+        ('original module-level downloads', ORIGINAL_IMPORT, {}),
+        ('lazy, nltk tokenizer', CURRENT, {'AFFINITE_TOKENIZER': 'nltk'}),
+        ('lazy, nltk tokenizer, no download', CURRENT, {'AFFINITE_TOKENIZER': 'nltk', 'AFFINITE_NLTK_DOWNLOAD': '0'}),
+        ('lazy, fast tokenizer', CURRENT, {'AFFINITE_TOKENIZER': 'fast'}),
+    ]
+    for label, snippet, env in cases:
+        runs = [run(snippet, env) for _ in range(args.runs)]
+        summary = '  '.join(f"{key}={sorted(r[key] for r in runs)[len(runs) // 2] * 1000:8.1f}ms"
+                            for key in runs[0])
+        print(f"{label:<36} {summary}")
+
+
+if __name__ == '__main__':
+    main()
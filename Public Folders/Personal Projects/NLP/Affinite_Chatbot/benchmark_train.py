@@ -0,0 +1,91 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.utils.data import Dataset, DataLoader
+
+from model import NeuralNet
+from preprocessing import bag_of_words, fast_tokenize, stem, tokenize
+from train import IGNORE_WORDS, accuracy, build_training_data, train
+
+TOKENIZERS = {'nltk': tokenize, 'fast': fast_tokenize}
+
+
+def notebook_training(intents, tokenizer, num_epochs=1000):
+    """
+    The data preparation and training loop from train.ipynb
+    """
+    all_words = []
+    tags = []
+    xy = []
+    for intent in intents['intents']:
+        tag = intent['tag']
+        tags.append(tag)
+        for pattern in intent['patterns']:
+            w = tokenizer(pattern)
+            all_words.extend(w)
+            xy.append((w, tag))
+    all_words = sorted(set(stem(w) for w in all_words if w not in IGNORE_WORDS))
+    tags = sorted(set(tags))
+
+    X_train = np.array([bag_of_words(pattern, all_words) for pattern, _ in xy])
+    y_train = np.array([tags.index(tag) for _, tag in xy])
+
+    class ChatDataset(Dataset):
+        def __len__(self):
+            return len(X_train)
+
+        def __getitem__(self, index):
+            return X_train[index], y_train[index]
+
+    train_loader = DataLoader(dataset=ChatDataset(), batch_size=8, shuffle=True, num_workers=0)
+    model = NeuralNet(len(X_train[0]), 8, len(tags))
+    criterion = nn.CrossEntropyLoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+    for epoch in range(num_epochs):
+        for (words, labels) in train_loader:
+            outputs = model(words)
+            loss = criterion(outputs, labels)
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+    return model, X_train, y_train
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare train.py with the train.ipynb loop")
+    parser.add_argument('--tokenizer', choices=sorted(TOKENIZERS), default='nltk')
+    parser.add_argument('--runs', type=int, default=3, help='seeds to average over')
+    args = parser.parse_args()
+
+    tokenizer = TOKENIZERS[args.tokenizer]
+    with open('intents.json', 'r') as f:
+        intents = json.load(f)
+
+    results = {'notebook (1000 epochs, DataLoader)': [], 'train.py (batch 8, early stop)': [],
+               'train.py (full batch, early stop)': []}
+    for seed in range(args.runs):
+        torch.manual_seed(seed)
+        start = time.perf_counter()
+        model, X, y = notebook_training(intents, tokenizer)
+        results['notebook (1000 epochs, DataLoader)'].append(
+            (time.perf_counter() - start, accuracy(model, X.astype(np.float32), y), 1000))
+
+        for label, batch_size, lr in (('train.py (batch 8, early stop)', 8, 0.001),
+                                      ('train.py (full batch, early stop)', 0, 0.01)):
+            start = time.perf_counter()
+            _, tags, X, y = build_training_data(intents, tokenizer)
+            model, epochs = train(X, y, len(tags), batch_size=batch_size, learning_rate=lr, seed=seed,
+                                  max_epochs=5000 if batch_size == 0 else 1000, verbose=False)
+            results[label].append((time.perf_counter() - start, accuracy(model, X, y), epochs))
+
+    for label, runs in results.items():
+        seconds, acc, epochs = (np.mean(column) for column in zip(*runs))
+        print(f"{label:<36} {seconds:7.2f}s  accuracy={acc:.4f}  epochs={epochs:.0f}")
+
+
+if __name__ == '__main__':
+    main()
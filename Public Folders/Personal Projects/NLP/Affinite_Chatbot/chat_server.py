@@ -0,0 +1,223 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from inference import ChatEngine
+
+BOT_NAME = "Sam"
+
+
+class MicroBatcher:
+    """
+    Collects sentences from many sessions and classifies them together
+    The first queued sentence waits at most max_delay seconds for others to
+    join its batch, then the whole batch goes through one NeuralNet forward
+    pass on a worker thread so the event loop keeps accepting messages
+    """
+    def __init__(self, engine, max_batch_size=256, max_delay=0.002):
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = 0
+        self.messages = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def predict(self, sentence):
+        """
+        Queue a sentence and wait for its (tag, confidence)
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((sentence, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            if self.max_delay > 0 and self.queue.qsize() < self.max_batch_size - 1:
+                await asyncio.sleep(self.max_delay)
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            sentences = [sentence for sentence, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.engine.predict_many, sentences)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.messages += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+class Session:
+    """
+    Per-session state: the recent conversation and when it was last active
+    """
+    def __init__(self, history_size=20):
+        self.history = deque(maxlen=history_size)
+        self.last_active = time.monotonic()
+
+
+class ChatService:
+    """
+    Chat service shared by all sessions
+    Loads data.pth and intents.json once through ChatEngine, keeps a Session
+    per session id, and answers through the MicroBatcher with the same 0.75
+    confidence fallback as chat.ipynb
+    """
+    def __init__(self, engine, max_batch_size=256, max_delay=0.002, session_ttl=1800):
+        self.engine = engine
+        self.batcher = MicroBatcher(engine, max_batch_size, max_delay)
+        self.session_ttl = session_ttl
+        self.sessions = {}
+        self._reaper = None
+
+    def start(self):
+        self.batcher.start()
+        self._reaper = asyncio.get_running_loop().create_task(self._reap_sessions())
+
+    async def stop(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+        await self.batcher.stop()
+
+    async def _reap_sessions(self):
+        # Drop sessions that have been idle longer than session_ttl
+        while True:
+            await asyncio.sleep(min(60, self.session_ttl))
+            cutoff = time.monotonic() - self.session_ttl
+            for session_id in [s for s, session in self.sessions.items() if session.last_active < cutoff]:
+                del self.sessions[session_id]
+
+    async def handle(self, session_id, message):
+        """
+        Answer one message from a session, returns (tag, confidence, response)
+        Messages are checked here, before they join a batch, so a bad one only
+        fails its own request
+        """
+        if not isinstance(message, str):
+            raise ValueError(f"message must be a string, got {type(message).__name__}")
+
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = Session()
+        session.last_active = time.monotonic()
+
+        tag, confidence = await self.batcher.predict(message)
+        response = self.engine.response_for(tag, confidence)
+        session.history.append((message, tag, response))
+        return tag, confidence, response
+
+    def stats(self):
+        batches = self.batcher.batches
+        return {
+            'sessions': len(self.sessions),
+            'messages': self.batcher.messages,
+            'batches': batches,
+            'mean_batch_size': self.batcher.messages / batches if batches else 0.0,
+        }
+
+    async def serve_connection(self, reader, writer):
+        """
+        Line-delimited JSON protocol, one connection may carry many sessions
+        and pipelined requests:
+        -> {"id": 1, "session": "alice", "message": "Hi there"}
+        <- {"id": 1, "session": "alice", "tag": "greeting", "response": "..."}
+        {"stats": true} returns the service statistics instead
+        """
+        write_lock = asyncio.Lock()
+        pending = set()
+
+        async def reply(request):
+            if request.get('invalid'):
+                payload = {'id': None, 'error': 'invalid JSON, expected an object'}
+            elif request.get('stats'):
+                payload = {'id': request.get('id'), **self.stats()}
+            else:
+                try:
+                    tag, confidence, response = await self.handle(request['session'], request['message'])
+                    payload = {'id': request.get('id'), 'session': request['session'], 'tag': tag,
+                               'confidence': confidence, 'response': response}
+                except Exception as e:
+                    payload = {'id': request.get('id'), 'error': str(e)}
+            async with write_lock:
+                writer.write((json.dumps(payload) + '\n').encode())
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+                if not isinstance(request, dict):
+                    request = {'invalid': True}
+                task = asyncio.create_task(reply(request))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            writer.close()
+
+
+async def serve(service, host='127.0.0.1', port=8765, ready=None):
+    """
+    Run the chat service on a TCP port until cancelled
+    ready, if given, is an asyncio.Event set once the server is listening
+    """
+    service.start()
+    server = await asyncio.start_server(service.serve_connection, host, port, limit=2 ** 20)
+    if ready is not None:
+        ready.set()
+    print(f"{BOT_NAME} is listening on {host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent multi-session chatbot server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--data', default='data.pth')
+    parser.add_argument('--intents', default='intents.json')
+    parser.add_argument('--max-batch-size', type=int, default=256)
+    parser.add_argument('--max-delay-ms', type=float, default=2.0, help='longest a message waits for its batch')
+    parser.add_argument('--threads', type=int, default=1, help='torch intra-op threads')
+    args = parser.parse_args()
+
+    engine = ChatEngine(args.data, args.intents, num_threads=args.threads)
+    service = ChatService(engine, args.max_batch_size, args.max_delay_ms / 1000)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
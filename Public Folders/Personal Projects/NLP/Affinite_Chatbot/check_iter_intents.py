@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from intent_index import iter_intents
+
+# Layouts iter_intents has to stream the same as json.load, including values
+# that a chunk boundary can split anywhere
+LAYOUTS = [
+    '{"intents": [{"tag": "greeting", "patterns": ["Hi"], "responses": ["Hello"]}]}',
+    '{"version": 1.5e3, "intents": []}',
+    '{"version": -12.25E-2, "count": 10, "intents": [{"tag": "a", "patterns": [], "responses": []}]}',
+    '{"meta": {"intents": "not this one", "sizes": [1, 2.5, 3e2]}, "flag": true, "none": null,\n'
+    ' "intents": [ {"tag": "b", "patterns": ["x"], "responses": ["y"], "weight": 0.75} ,\n'
+    '  {"tag": "c", "patterns": [], "responses": [], "weight": 12} ]\n}\n',
+]
+
+# Files iter_intents has to reject
+INVALID = [
+    '[{"tag": "a"}]',
+    '{"version": 2}',
+    '{"intents": {"tag": "a"}}',
+    '{"intents": [{"tag": "a"}',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check iter_intents against json.load at many chunk sizes")
+    parser.add_argument('--intents', default='intents.json', help='also check this catalog')
+    args = parser.parse_args()
+    failures = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'intents.json')
+        cases = list(LAYOUTS)
+        if os.path.exists(args.intents):
+            with open(args.intents, 'r', encoding='utf-8') as f:
+                cases.append(f.read())
+
+        for i, text in enumerate(cases):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            expected = json.loads(text)['intents']
+            for chunk_size in sorted({1, 2, 3, 5, 7, 16, 64, len(text), 1 << 20}):
+                try:
+                    result = list(iter_intents(path, chunk_size))
+                except ValueError as e:
+                    result = e
+                if result != expected:
+                    failures.append(f"layout {i} at chunk_size={chunk_size}: {result!r}")
+
+        for i, text in enumerate(INVALID):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            for chunk_size in (1, 4, 1 << 20):
+                try:
+                    list(iter_intents(path, chunk_size))
+                    failures.append(f"invalid file {i} at chunk_size={chunk_size} was accepted")
+                except ValueError:
+                    pass
+
+    print(f"checked {len(cases)} layouts and {len(INVALID)} invalid files")
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
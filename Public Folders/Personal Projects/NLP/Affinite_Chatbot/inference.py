@@ -0,0 +1,124 @@
+import random
+
+import torch
+
+from intent_index import IntentIndex, iter_intents
+from model import NeuralNet, to_sparse_tensor
+from preprocessing import Vocabulary, tokenize
+
+FALLBACK_RESPONSE = "I do not understand..."
+
+
+class ChatEngine:
+    """
+    Reusable inference engine for the chatbot
+    Loads the data.pth bundle and intents.json once, indexes the responses by
+    tag, and runs the model without autograd, optionally compiled with
+    TorchScript. Sentences can be answered one at a time or in batches
+    example:
+    engine = ChatEngine('data.pth', 'intents.json', num_threads=1, jit='script')
+    engine.respond("Hi there")
+    -> "Hello! Welcome to Affinite, your family connection platform!"
+    engine.predict_many(["Hi there", "What does premium cost?"])
+    -> [("greeting", 0.99), ("subscription", 0.97)]
+    For very large catalogs, sparse=True feeds the model sparse bag of words
+    batches, and shortlist=k only lets the model choose among the k intents
+    whose patterns are most similar to the sentence (see IntentIndex)
+    """
+    def __init__(self, data_path='data.pth', intents_path='intents.json', threshold=0.75,
+                 num_threads=None, jit=None, device='cpu', tokenizer=tokenize, warm_up=True,
+                 sparse=False, shortlist=None):
+        if num_threads is not None:
+            # Process-wide: small MLPs run fastest on one or two intra-op threads
+            torch.set_num_threads(num_threads)
+        self.device = torch.device(device)
+        self.threshold = threshold
+        self.tokenizer = tokenizer
+
+        data = torch.load(data_path, map_location=self.device)
+        self.vocab = Vocabulary(data['all_word'])
+        self.tags = data['tags']
+
+        model = NeuralNet(data['input_size'], data['hidden_size'], data['output_size']).to(self.device)
+        model.load_state_dict(data['model_state'])
+        model.eval()
+        if jit == 'script':
+            model = torch.jit.optimize_for_inference(torch.jit.script(model))
+        elif jit == 'trace':
+            example = torch.zeros(1, data['input_size'], device=self.device)
+            model = torch.jit.optimize_for_inference(torch.jit.trace(model, example))
+        elif jit is not None:
+            raise ValueError(f"jit must be None, 'script' or 'trace', got {jit!r}")
+        if sparse and jit is not None:
+            raise ValueError("sparse inputs need the eager model, use jit=None")
+        self.model = model
+        self.sparse = sparse
+
+        # Tag -> responses index, built once instead of scanning intents per turn
+        self.responses = {intent['tag']: intent['responses'] for intent in iter_intents(intents_path)}
+
+        self.shortlist = shortlist
+        self.index = None
+        if shortlist:
+            self.index = IntentIndex.build(iter_intents(intents_path), tokenizer=tokenizer)
+            self.tag_ids = {tag: idx for idx, tag in enumerate(self.tags)}
+
+        if warm_up:
+            # Load the tokenizer data and stemmer now rather than on the first message
+            self.predict("hello")
+
+    def predict_many(self, sentences):
+        """
+        Classify many raw sentences in one forward pass
+        Returns a list of (tag, confidence) pairs
+        """
+        if not sentences:
+            return []
+        tokenized = [self.tokenizer(s) for s in sentences]
+        with torch.inference_mode():
+            if self.sparse:
+                X = to_sparse_tensor(self.vocab.transform(tokenized, sparse=True)).to(self.device)
+                probs = torch.softmax(self.model.forward_sparse(X), dim=1)
+            else:
+                X = torch.from_numpy(self.vocab.transform(tokenized)).to(self.device)
+                probs = torch.softmax(self.model(X), dim=1)
+
+            if self.index is not None:
+                # Restrict each sentence to its short-listed intents, keeping
+                # the full distribution when nothing matched
+                mask = torch.zeros_like(probs, dtype=torch.bool)
+                for row, tokens in enumerate(tokenized):
+                    ids = [self.tag_ids[t] for t, _ in self.index.search(tokens, self.shortlist)
+                           if t in self.tag_ids]
+                    mask[row, ids if ids else slice(None)] = True
+                confidence, predicted = torch.max(probs.masked_fill(~mask, -1.0), dim=1)
+            else:
+                confidence, predicted = torch.max(probs, dim=1)
+        return [(self.tags[i], c) for i, c in zip(predicted.tolist(), confidence.tolist())]
+
+    def predict(self, sentence):
+        """
+        Classify a single raw sentence, returns (tag, confidence)
+        """
+        return self.predict_many([sentence])[0]
+
+    def response_for(self, tag, confidence):
+        """
+        Pick a random response for a tag, or the fallback when confidence is
+        not above the threshold
+        """
+        if confidence > self.threshold and tag in self.responses:
+            return random.choice(self.responses[tag])
+        return FALLBACK_RESPONSE
+
+    def respond_many(self, sentences):
+        """
+        Answer many raw sentences, one response per sentence
+        """
+        return [self.response_for(tag, conf) for tag, conf in self.predict_many(sentences)]
+
+    def respond(self, sentence):
+        """
+        Answer a single raw sentence
+        """
+        return self.response_for(*self.predict(sentence))
@@ -0,0 +1,191 @@
+import json
+import math
+from array import array
+from functools import lru_cache
+
+import numpy as np
+
+from preprocessing import IGNORE_WORDS, stem, tokenize
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+
+
+def iter_intents(path, chunk_size=1 << 20):
+    """
+    Yield the intents of an intents.json file one at a time
+    Reads the file in chunks and decodes one intent object at a time, so
+    catalogs with hundreds of thousands of patterns never have to be held
+    in memory as a whole. Expects the {"intents": [...]} layout; other
+    top-level keys are skipped
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+
+        def fill():
+            # Drop what was consumed and read the next chunk
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            eof = not chunk
+
+        def skip(chars):
+            # Move past any of chars, returns the next character or '' at the end
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in chars:
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if eof:
+                    return ''
+                fill()
+
+        def decode():
+            # Decode the JSON value at pos, reading more while it runs past the buffer
+            nonlocal pos
+            while True:
+                try:
+                    value, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    fill()
+                    continue
+                # A number cut by the chunk boundary (1.5e|3) decodes as a shorter
+                # one, so a value only counts once the delimiter after it is read
+                after = end
+                while after < len(buffer) and buffer[after] in _WHITESPACE:
+                    after += 1
+                if not eof and (after == len(buffer) or buffer[after] not in ',:]}'):
+                    fill()
+                    continue
+                pos = end
+                return value
+
+        # Walk the keys of the top-level object up to the intents list
+        if skip(_WHITESPACE) != '{':
+            raise ValueError(f"{path} is not a JSON object")
+        pos += 1
+        while True:
+            if skip(_WHITESPACE + ',') != '"':
+                raise ValueError(f"{path} has no \"intents\" list")
+            key = decode()
+            if skip(_WHITESPACE) != ':':
+                raise ValueError(f"{path} is not valid JSON, expected ':' after {key!r}")
+            pos += 1
+            char = skip(_WHITESPACE)
+            if key == 'intents':
+                if char != '[':
+                    raise ValueError(f"\"intents\" in {path} is not a list")
+                pos += 1
+                break
+            decode()
+
+        while True:
+            # Skip whitespace and the comma between intents
+            char = skip(_WHITESPACE + ',')
+            if not char:
+                raise ValueError(f"{path} ended inside the \"intents\" list")
+            if char == ']':
+                return
+            yield decode()
+
+
+class IntentIndex:
+    """
+    Similarity index over the stemmed patterns of an intents catalog
+    Each pattern is a TF-IDF weighted, L2 normalized bag of stems in a
+    sparse pattern x stem matrix stored by column, so a query only touches
+    the patterns that share a stem with it. search() short-lists the best
+    matching intents, scoring each intent by its closest pattern
+    example:
+    index = IntentIndex.build(iter_intents('intents.json'))
+    index.search(tokenize("how much is premium"), k=3)
+    -> [("subscription", 0.49), ("thanks", 0.34), ("greeting", 0.31)]
+    """
+    def __init__(self, tags, vocab, idf, matrix, pattern_tags):
+        self.tags = tags
+        self.vocab = vocab
+        self.idf = idf
+        self.matrix = matrix
+        self.pattern_tags = pattern_tags
+        self.stem = lru_cache(maxsize=100000)(stem)
+
+    @classmethod
+    def build(cls, intents, tokenizer=tokenize):
+        """
+        Build the index from an iterable of intents, e.g. iter_intents(path)
+        Only integer ids of the stems are kept, never the pattern text
+        """
+        from scipy.sparse import csc_matrix
+
+        cached_stem = lru_cache(maxsize=100000)(stem)
+        vocab = {}
+        tags = []
+        tag_ids = {}
+        rows = array('i')
+        cols = array('i')
+        pattern_tags = array('i')
+
+        n_patterns = 0
+        for intent in intents:
+            tag_id = tag_ids.get(intent['tag'])
+            if tag_id is None:
+                tag_id = tag_ids[intent['tag']] = len(tags)
+                tags.append(intent['tag'])
+            for pattern in intent['patterns']:
+                ids = {vocab.setdefault(cached_stem(w), len(vocab)) for w in tokenizer(pattern)
+                       if w not in IGNORE_WORDS}
+                rows.extend([n_patterns] * len(ids))
+                cols.extend(ids)
+                pattern_tags.append(tag_id)
+                n_patterns += 1
+
+        rows = np.frombuffer(rows, dtype=np.int32)
+        cols = np.frombuffer(cols, dtype=np.int32)
+        df = np.bincount(cols, minlength=len(vocab))
+        idf = (np.log((1 + n_patterns) / (1 + df)) + 1).astype(np.float32)
+        values = idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=values.astype(np.float64) ** 2, minlength=n_patterns))
+        values /= norms[rows].astype(np.float32)
+        matrix = csc_matrix((values, (rows, cols)), shape=(n_patterns, len(vocab)), dtype=np.float32)
+
+        return cls(tags, vocab, idf, matrix, np.frombuffer(pattern_tags, dtype=np.int32))
+
+    def search(self, tokenized_sentence, k=10):
+        """
+        Return up to k (tag, score) pairs, best first, where score is the
+        cosine similarity of the sentence to the intent's closest pattern
+        """
+        cols = sorted({self.vocab[s] for s in (self.stem(w) for w in tokenized_sentence
+                                                if w not in IGNORE_WORDS) if s in self.vocab})
+        if not cols:
+            return []
+        weights = self.idf[cols]
+        weights /= math.sqrt(float(np.dot(weights, weights)))
+
+        # Walk only the posting lists of the query's stems
+        indptr, indices, data = self.matrix.indptr, self.matrix.indices, self.matrix.data
+        spans = [(indptr[c], indptr[c + 1]) for c in cols]
+        hit_rows = np.concatenate([indices[a:b] for a, b in spans])
+        hit_scores = np.concatenate([data[a:b] * w for (a, b), w in zip(spans, weights)])
+        patterns, inverse = np.unique(hit_rows, return_inverse=True)
+        scores = np.bincount(inverse, weights=hit_scores)
+
+        # Best pattern per intent, then the top k intents
+        order = np.argsort(-scores, kind='stable')
+        ranked_tags = self.pattern_tags[patterns[order]]
+        _, first = np.unique(ranked_tags, return_index=True)
+        first.sort()
+        return [(self.tags[ranked_tags[i]], float(scores[order[i]])) for i in first[:k]]
+
+    def memory_bytes(self):
+        """
+        Approximate memory held by the index arrays
+        """
+        m = self.matrix
+        return m.data.nbytes + m.indices.nbytes + m.indptr.nbytes + self.idf.nbytes + self.pattern_tags.nbytes
@@ -0,0 +1,160 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# Puts the Personal Projects folder on the import path for the shared instrumentation package
+import profiling_hooks  # noqa: F401
+from instrumentation.load import free_port, start_server
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class Connection:
+    """
+    One TCP connection to the chat server shared by many simulated sessions,
+    matching pipelined responses to requests by id
+    """
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}
+        self.ids = itertools.count()
+        self._reader_task = asyncio.create_task(self._read())
+
+    @classmethod
+    async def open(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port, limit=2 ** 20)
+        return cls(reader, writer)
+
+    async def _read(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            payload = json.loads(line)
+            future = self.pending.pop(payload.get('id'), None)
+            if future is not None and not future.done():
+                future.set_result(payload)
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("connection closed"))
+
+    async def request(self, payload):
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self.writer.write((json.dumps({'id': request_id, **payload}) + '\n').encode())
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        self._reader_task.cancel()
+
+
+async def simulate_session(connection, session_id, sentences, messages, think_time, rng, latencies, errors):
+    """
+    One user: sends messages one after another with a random pause between them
+    """
+    await asyncio.sleep(rng.uniform(0, think_time))
+    for _ in range(messages):
+        start = time.perf_counter()
+        try:
+            reply = await connection.request({'session': session_id, 'message': rng.choice(sentences)})
+            if 'error' in reply:
+                errors.append(reply['error'])
+            else:
+                latencies.append(time.perf_counter() - start)
+        except ConnectionError as e:
+            errors.append(str(e))
+        await asyncio.sleep(rng.uniform(0, think_time))
+
+
+async def run_load(host, port, sessions, messages, connections, think_time, seed=0):
+    with open(os.path.join(HERE, 'intents.json'), 'r') as f:
+        intents = json.load(f)
+    # Known patterns plus some off-topic messages that hit the fallback
+    sentences = [p for intent in intents['intents'] for p in intent['patterns']]
+    sentences += ["What is the weather like on Mars", "Recommend me a pizza topping", "asdf qwerty"]
+
+    pool = [await Connection.open(host, port) for _ in range(min(connections, sessions))]
+    rng = random.Random(seed)
+    latencies, errors = [], []
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        simulate_session(pool[i % len(pool)], f"user-{i}", sentences, messages, think_time,
+                         random.Random(rng.random()), latencies, errors)
+        for i in range(sessions)
+    ))
+    elapsed = time.perf_counter() - start
+
+    stats = await pool[0].request({'stats': True})
+    for connection in pool:
+        await connection.close()
+
+    latencies_ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+    return {
+        'sessions': sessions,
+        'messages_per_session': messages,
+        'connections': len(pool),
+        'think_time_s': think_time,
+        'messages': len(latencies),
+        'errors': len(errors),
+        'elapsed_s': elapsed,
+        'messages_per_s': len(latencies) / elapsed,
+        'latency_ms': {
+            'mean': float(latencies_ms.mean()) if len(latencies) else 0.0,
+            'p50': float(p50),
+            'p95': float(p95),
+            'p99': float(p99),
+            'max': float(latencies_ms.max()) if len(latencies) else 0.0,
+        },
+        'server': {k: v for k, v in stats.items() if k != 'id'},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate many concurrent chat sessions against chat_server.py")
+    parser.add_argument('--host', default='127.0.0.1', help='with --port, target an already running server')
+    parser.add_argument('--port', type=int, help='port of a running server (default: start one)')
+    parser.add_argument('--sessions', type=int, default=2000)
+    parser.add_argument('--messages', type=int, default=5, help='messages per session')
+    parser.add_argument('--connections', type=int, default=64, help='TCP connections shared by the sessions')
+    parser.add_argument('--think-time', type=float, default=0.5, help='longest pause between messages, seconds')
+    parser.add_argument('--max-batch-size', type=int, default=256)
+    parser.add_argument('--max-delay-ms', type=float, default=2.0)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    process = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        process = start_server([sys.executable, 'chat_server.py', '--port', str(port),
+                                '--max-batch-size', str(args.max_batch_size),
+                                '--max-delay-ms', str(args.max_delay_ms)], port, HERE)
+    try:
+        report = asyncio.run(run_load(args.host, port, args.sessions, args.messages,
+                                      args.connections, args.think_time))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,17 @@
+import numpy as np
 import torch
 import torch.nn as nn
 
+def to_sparse_tensor(matrix):
+    """
+    Convert a scipy sparse bag of words matrix to a coalesced torch sparse
+    COO tensor for NeuralNet.forward_sparse
+    """
+    coo = matrix.tocoo()
+    indices = torch.from_numpy(np.vstack([coo.row, coo.col]).astype(np.int64))
+    values = torch.from_numpy(coo.data.astype(np.float32))
+    return torch.sparse_coo_tensor(indices, values, coo.shape).coalesce()
+
 class NeuralNet(nn.Module):
     def __init__(self, input_size, hidden_size, num_classes):
         super(NeuralNet, self).__init__()
@@ -16,3 +27,15 @@ class NeuralNet(nn.Module):
         out = self.relu(out)
         out = self.l3(out)
         return out
+
+    def forward_sparse(self, x):
+        """
+        Same as forward for a sparse bag of words batch: the first layer
+        only touches the weight columns of words present in each sentence
+        """
+        out = torch.sparse.mm(x, self.l1.weight.t()) + self.l1.bias
+        out = self.relu(out)
+        out = self.l2(out)
+        out = self.relu(out)
+        out = self.l3(out)
+        return out
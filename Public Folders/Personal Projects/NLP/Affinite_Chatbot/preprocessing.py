@@ -1,30 +1,81 @@
-import nltk
-from nltk.stem.porter import PorterStemmer
+import os
+import re
+import threading
 import numpy as np
+from functools import lru_cache
 
-# Download required NLTK data
-try:
-    nltk.download('punkt')
-    nltk.download('punkt_tab')
-    print("NLTK data downloaded successfully!")
-except Exception as e:
-    print(f"Error downloading NLTK data: {e}")
+from profiling_hooks import profiled
 
-# Initialize stemmer
-stemmer = PorterStemmer()
+# Tokenizer used by tokenize(): "nltk" for nltk.word_tokenize, "fast" for the
+# dependency-free regex tokenizer
+TOKENIZER = os.environ.get('AFFINITE_TOKENIZER', 'nltk')
+# Set to 0 in air-gapped containers so missing NLTK data is never downloaded
+NLTK_DOWNLOAD = os.environ.get('AFFINITE_NLTK_DOWNLOAD', '1') == '1'
+
+# Punctuation marks left out of the vocabulary
+IGNORE_WORDS = ['?', '!', ',', '.']
+
+# NLTK is imported and its data checked on first use, not at import time
+_nltk_lock = threading.Lock()
+_punkt_ready = None
+_stemmer = None
+
+# Treebank-style tokens: contractions split the way word_tokenize does
+# ("don't" -> "do", "n't"; "I'm" -> "I", "'m"), hyphenated words and numbers
+# kept whole, every other punctuation character on its own
+_FAST_TOKEN_RE = re.compile(r"""
+    \w+(?=n't\b)
+  | n't\b
+  | '(?:s|m|d|ll|re|ve)\b
+  | \d+(?:[.,]\d+)+
+  | \w+(?:-\w+)*
+  | \.\.\.
+  | \S
+""", re.VERBOSE | re.IGNORECASE)
+
+def _load_punkt():
+    """
+    Make sure the punkt tokenizer data is available, looking for it (and
+    downloading it if allowed) only once per process
+    Returns False when the data cannot be found
+    """
+    global _punkt_ready
+    if _punkt_ready is None:
+        with _nltk_lock:
+            if _punkt_ready is None:
+                import nltk
+                try:
+                    nltk.data.find('tokenizers/punkt')
+                    nltk.data.find('tokenizers/punkt_tab')
+                    _punkt_ready = True
+                except LookupError:
+                    _punkt_ready = NLTK_DOWNLOAD and all(
+                        nltk.download(name, quiet=True) for name in ('punkt', 'punkt_tab'))
+                    if not _punkt_ready:
+                        print("NLTK punkt data not available, using the fast tokenizer")
+    return _punkt_ready
+
+def fast_tokenize(sentence):
+    """
+    Split sentence into tokens without NLTK or its data
+    Gives the same tokens as nltk.word_tokenize on the intents.json patterns
+    """
+    return _FAST_TOKEN_RE.findall(sentence)
 
 def tokenize(sentence):
     """
     Split sentence into array of words/tokens
     A token can be a word or punctuation character, or number
     """
+    global _punkt_ready
+    if TOKENIZER == 'fast' or not _load_punkt():
+        return fast_tokenize(sentence)
+    import nltk
     try:
         return nltk.word_tokenize(sentence)
     except LookupError:
-        print("NLTK data not found. Downloading...")
-        nltk.download('punkt')
-        nltk.download('punkt_tab')
-        return nltk.word_tokenize(sentence)
+        _punkt_ready = False
+        return fast_tokenize(sentence)
 
 def stem(word):
     """
@@ -34,8 +85,13 @@ def stem(word):
     words = [stem(w) for w in words]
     -> ["organ", "organ", "organ"]
     """
-    return stemmer.stem(word.lower())
+    global _stemmer
+    if _stemmer is None:
+        from nltk.stem.porter import PorterStemmer
+        _stemmer = PorterStemmer()
+    return _stemmer.stem(word.lower())
 
+@profiled
 def bag_of_words(tokenized_sentence, words):
     """
     Return bag of words array:
@@ -45,8 +101,11 @@ def bag_of_words(tokenized_sentence, words):
     words = ["hi", "hello", "I", "you", "bye", "thank", "cool"]
     bag   = [  0 ,    1 ,    0 ,   1 ,    0 ,     0 ,      0]
     """
+    if isinstance(words, Vocabulary):
+        return words.bag_of_words(tokenized_sentence)
+
     # Stem each word
-    sentence_words = [stem(word) for word in tokenized_sentence]
+    sentence_words = {stem(word) for word in tokenized_sentence}
     # Initialize bag with 0 for each word
     bag = np.zeros(len(words), dtype=np.float32)
     for idx, w in enumerate(words):
@@ -54,3 +113,63 @@ def bag_of_words(tokenized_sentence, words):
             bag[idx] = 1
 
     return bag
+
+class Vocabulary:
+    """
+    Indexed vocabulary of stemmed words for building bag of words vectors
+    Looks words up in a word -> column map instead of scanning the whole
+    vocabulary, and caches stems in a bounded LRU cache
+    example:
+    vocab = Vocabulary(["hi", "hello", "I", "you", "bye", "thank", "cool"])
+    vocab.bag_of_words(["hello", "how", "are", "you"])
+    -> [0, 1, 0, 1, 0, 0, 0]
+    vocab.transform([["hello"], ["bye", "you"]])
+    -> [[0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 1, 1, 0, 0]]
+    """
+    def __init__(self, words, stem_cache_size=50000):
+        self.words = list(words)
+        self.index = {w: idx for idx, w in enumerate(self.words)}
+        if len(self.index) != len(self.words):
+            raise ValueError("Vocabulary words must be unique")
+        self.stem = lru_cache(maxsize=stem_cache_size)(stem)
+
+    def __len__(self):
+        return len(self.words)
+
+    def indices(self, tokenized_sentence):
+        """
+        Return the sorted, unique column indices of the known words in a sentence
+        """
+        found = {self.index.get(self.stem(word)) for word in tokenized_sentence}
+        found.discard(None)
+        return sorted(found)
+
+    def bag_of_words(self, tokenized_sentence):
+        """
+        Same output as bag_of_words(tokenized_sentence, words)
+        """
+        bag = np.zeros(len(self.words), dtype=np.float32)
+        bag[self.indices(tokenized_sentence)] = 1
+        return bag
+
+    @profiled
+    def transform(self, tokenized_sentences, sparse=False):
+        """
+        Return the bag of words vectors of many sentences as one matrix,
+        one row per sentence. With sparse=True a scipy.sparse CSR matrix
+        is returned instead of a dense float32 array
+        """
+        rows = [self.indices(sentence) for sentence in tokenized_sentences]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in rows], out=indptr[1:])
+        cols = np.fromiter((c for r in rows for c in r), dtype=np.int64, count=indptr[-1])
+
+        if sparse:
+            from scipy.sparse import csr_matrix
+            data = np.ones(len(cols), dtype=np.float32)
+            return csr_matrix((data, cols, indptr), shape=(len(rows), len(self.words)))
+
+        matrix = np.zeros((len(rows), len(self.words)), dtype=np.float32)
+        matrix[np.repeat(np.arange(len(rows)), np.diff(indptr)), cols] = 1
+        return matrix
@@ -0,0 +1,174 @@
+import argparse
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from intent_index import iter_intents
+from model import NeuralNet, to_sparse_tensor
+from preprocessing import IGNORE_WORDS, Vocabulary, stem, tokenize
+
+
+def build_training_data(intents, tokenizer=tokenize, sparse=False):
+    """
+    Turn the intents into the vocabulary, the sorted tags and the
+    bag of words training matrix, same as train.ipynb
+    intents can be the loaded intents.json or an iterable of intents,
+    such as iter_intents(path)
+    Returns all_words, tags, X_train (float32 array, or scipy CSR matrix
+    with sparse=True), y_train (int64 array)
+    """
+    if isinstance(intents, dict):
+        intents = intents['intents']
+    all_words = []
+    tags = []
+    xy = []
+    for intent in intents:
+        tag = intent['tag']
+        tags.append(tag)
+        for pattern in intent['patterns']:
+            w = tokenizer(pattern)
+            all_words.extend(w)
+            xy.append((w, tag))
+
+    all_words = sorted(set(stem(w) for w in all_words if w not in IGNORE_WORDS))
+    tags = sorted(set(tags))
+
+    tag_index = {tag: idx for idx, tag in enumerate(tags)}
+    X_train = Vocabulary(all_words).transform([pattern for pattern, _ in xy], sparse=sparse)
+    y_train = np.array([tag_index[tag] for _, tag in xy], dtype=np.int64)
+    return all_words, tags, X_train, y_train
+
+
+def train(X_train, y_train, num_classes, hidden_size=8, batch_size=8, learning_rate=0.001, max_epochs=1000,
+          patience=50, min_delta=1e-4, device='cpu', seed=None, verbose=True):
+    """
+    Train NeuralNet with the whole dataset kept as device tensors
+    Each epoch shuffles with an index permutation instead of a DataLoader,
+    and training stops once the epoch loss has not improved by min_delta
+    for patience epochs. batch_size=0 trains on the full batch
+    A scipy sparse X_train stays sparse on the device and goes through
+    NeuralNet.forward_sparse, for vocabularies too large for a dense matrix
+    num_classes is len(tags), as in train.ipynb: a tag without patterns
+    never shows up in y_train but still needs its output
+    Returns the model and the number of epochs run
+    """
+    if max_epochs < 1:
+        raise ValueError(f"max_epochs must be at least 1, got {max_epochs}")
+    if seed is not None:
+        torch.manual_seed(seed)
+    device = torch.device(device)
+    sparse = not isinstance(X_train, np.ndarray)
+    if sparse:
+        X = to_sparse_tensor(X_train).to(device)
+    else:
+        X = torch.as_tensor(X_train, dtype=torch.float32, device=device)
+    y = torch.as_tensor(y_train, dtype=torch.int64, device=device)
+    n_samples = X.shape[0]
+    batch_size = batch_size or n_samples
+
+    model = NeuralNet(X.shape[1], hidden_size, num_classes).to(device)
+    criterion = nn.CrossEntropyLoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=learning_rate)
+
+    best_loss = float('inf')
+    stale_epochs = 0
+    for epoch in range(max_epochs):
+        permutation = torch.randperm(n_samples, device=device)
+        epoch_loss = torch.zeros((), device=device)
+        for start in range(0, n_samples, batch_size):
+            idx = permutation[start:start + batch_size]
+            outputs = model.forward_sparse(X.index_select(0, idx)) if sparse else model(X[idx])
+            loss = criterion(outputs, y[idx])
+
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            epoch_loss += loss.detach() * len(idx)
+
+        # One host sync per epoch for the plateau check
+        epoch_loss = epoch_loss.item() / n_samples
+        if epoch_loss < best_loss - min_delta:
+            best_loss = epoch_loss
+            stale_epochs = 0
+        else:
+            stale_epochs += 1
+
+        if verbose and (epoch + 1) % 100 == 0:
+            print(f'epoch {epoch+1}/{max_epochs}, loss={epoch_loss:.4f}')
+        if stale_epochs >= patience:
+            if verbose:
+                print(f'loss plateaued, stopping after epoch {epoch+1}')
+            break
+
+    if verbose:
+        print(f'final loss, loss={epoch_loss:.4f}')
+    return model, epoch + 1
+
+
+def accuracy(model, X_train, y_train):
+    """
+    Fraction of training patterns the model classifies correctly
+    """
+    device = next(model.parameters()).device
+    with torch.inference_mode():
+        if isinstance(X_train, np.ndarray):
+            outputs = model(torch.as_tensor(X_train, device=device))
+        else:
+            outputs = model.forward_sparse(to_sparse_tensor(X_train).to(device))
+        predicted = outputs.argmax(dim=1).cpu().numpy()
+    return float((predicted == y_train).mean())
+
+
+def save_model(model, all_words, tags, hidden_size, file='data.pth'):
+    """
+    Save the trained model with the same schema as train.ipynb
+    """
+    data = {
+        "model_state": model.state_dict(),
+        "input_size": len(all_words),
+        "output_size": len(tags),
+        "hidden_size": hidden_size,
+        "all_word": all_words,
+        "tags": tags
+    }
+    torch.save(data, file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the chatbot intent model")
+    parser.add_argument('--intents', default='intents.json')
+    parser.add_argument('--output', default='data.pth')
+    parser.add_argument('--hidden-size', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=8, help='0 trains on the full batch')
+    parser.add_argument('--learning-rate', type=float, default=0.001)
+    parser.add_argument('--max-epochs', type=int, default=1000)
+    parser.add_argument('--patience', type=int, default=50, help='epochs without improvement before stopping')
+    parser.add_argument('--min-delta', type=float, default=1e-4)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--sparse', action='store_true', help='keep the bag of words matrix sparse')
+    args = parser.parse_args()
+    if args.max_epochs < 1:
+        parser.error('--max-epochs must be at least 1')
+
+    start = time.perf_counter()
+    all_words, tags, X_train, y_train = build_training_data(iter_intents(args.intents), sparse=args.sparse)
+    print(X_train.shape[0], "patterns,", len(tags), "tags,", len(all_words), "unique stemmed words")
+
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    model, epochs = train(X_train, y_train, len(tags), hidden_size=args.hidden_size, batch_size=args.batch_size,
+                          learning_rate=args.learning_rate, max_epochs=args.max_epochs,
+                          patience=args.patience, min_delta=args.min_delta, device=device, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    print(f'trained {epochs} epochs in {elapsed:.2f}s, accuracy={accuracy(model, X_train, y_train):.4f}')
+
+    try:
+        save_model(model, all_words, tags, args.hidden_size, args.output)
+        print('Model successfully saved')
+    except OSError as e:
+        print(f'save unsuccessful: {e}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""
+Shared profiling hooks for the job application predictor, the hand gesture server
+and the Affinite chatbot.
+
+Hot paths are wrapped with ``@profiled`` or ``with stage(...)``. With tracing off
+(the default) decorated functions are left untouched and ``stage()`` is a shared
+no-op, so the hooks can stay in production code.
+
+Each project imports the hooks through a small ``profiling_hooks.py`` that appends
+``Personal Projects`` to ``sys.path``, so the scripts work when run from their own
+folder; putting ``Personal Projects`` on ``PYTHONPATH`` does the same. Only the hand
+gesture shim falls back to no-op hooks, because its Docker image ships without this
+package. To record a trace, set:
+
+- ``PROFILE_TRACE``: trace file to write at exit, e.g. ``trace-{pid}.json``.
+- ``PROFILE_MEMORY``: ``rss`` (or ``1``) to sample resident memory around every
+  stage, ``python`` to sample tracemalloc instead. Off by default.
+- ``PROFILE_MAX_EVENTS``: size of the in-memory event buffer, default 1,000,000.
+
+Open the file in chrome://tracing or https://ui.perfetto.dev.
+
+``instrumentation.load`` holds the server helpers shared by the load generators.
+"""
+
+from .tracer import (Tracer, disable, enable, enabled, profiled, sample_memory, stage,
+                     write_trace)
+
+__all__ = ['Tracer', 'disable', 'enable', 'enabled', 'profiled', 'sample_memory', 'stage',
+           'write_trace']
@@ -0,0 +1,93 @@
+"""
+check_overhead.py
+Checks that the profiling hooks stay out of the way while tracing is off.
+
+Run from the ``Personal Projects`` folder:
+
+    python -m instrumentation.check_overhead
+
+Exits with status 1 if a disabled ``@profiled`` function is not the original
+function, or if a disabled ``stage()`` block costs more than the bound below. It
+also reports the cost of the hooks with tracing on and checks the trace it writes.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from . import tracer
+
+# Most a disabled `with stage(...)` block may add to a call, in nanoseconds
+DISABLED_STAGE_BOUND_NS = 1000
+
+
+def work(x):
+    return x + 1
+
+
+def per_call_ns(fn, calls):
+    """
+    Times fn over a number of calls, keeping the best of five runs.
+
+    Returns:
+        float: Nanoseconds per call.
+    """
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter_ns()
+        for i in range(calls):
+            fn(i)
+        best = min(best, time.perf_counter_ns() - start)
+    return best / calls
+
+
+def staged(x):
+    with tracer.stage('work'):
+        return work(x)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the overhead of the profiling hooks")
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+    failures = []
+
+    # Disabled: the decorator must hand back the function itself
+    tracer.disable()
+    if tracer.profiled(work) is not work or tracer.profiled('named')(work) is not work:
+        failures.append("disabled @profiled wrapped the function")
+
+    baseline = per_call_ns(work, args.calls)
+    disabled_stage = per_call_ns(staged, args.calls) - baseline
+    print(f"plain call             {baseline:8.1f} ns")
+    print(f"disabled stage()       {disabled_stage:8.1f} ns extra (bound {DISABLED_STAGE_BOUND_NS} ns)")
+    if disabled_stage > DISABLED_STAGE_BOUND_NS:
+        failures.append(f"disabled stage() costs {disabled_stage:.1f} ns per call")
+
+    # Enabled: report the cost and check the trace is well formed
+    with tempfile.TemporaryDirectory() as tmp:
+        for memory in (None, 'rss'):
+            tracer.enable(os.path.join(tmp, 'trace.json'), memory=memory)
+            traced = tracer.profiled(work)
+            enabled_cost = per_call_ns(traced, args.calls // 10) - baseline
+            print(f"enabled, memory={str(memory):<6} {enabled_cost:8.1f} ns extra")
+
+            with open(tracer.write_trace(), 'r') as f:
+                events = json.load(f)['traceEvents']
+            complete = [e for e in events if e['ph'] == 'X']
+            if len(complete) != 5 * (args.calls // 10) or complete[0]['name'] != 'work':
+                failures.append(f"trace with memory={memory} has {len(complete)} stage events")
+            if memory and not any(e['ph'] == 'C' for e in events):
+                failures.append("trace has no memory samples")
+        tracer.disable()
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
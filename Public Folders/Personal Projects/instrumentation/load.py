@@ -0,0 +1,50 @@
+"""
+load.py
+Helpers shared by the load generators of the hand gesture server and the chatbot.
+"""
+
+import socket
+import subprocess
+import time
+
+
+def free_port():
+    """
+    Returns:
+        int: A free local TCP port.
+    """
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(args, port, cwd=None, env=None, timeout=120):
+    """
+    Starts a server in a subprocess and waits until it accepts connections.
+
+    Args:
+        args (list): Command line of the server.
+        port (int): Local port the server listens on.
+        cwd (str): Working directory of the server.
+        env (dict): Environment of the server, defaults to this process's.
+        timeout (float): Seconds to wait for the server to start.
+
+    Returns:
+        subprocess.Popen: The server process.
+
+    Raises:
+        RuntimeError: If the server exits or does not start in time.
+    """
+    process = subprocess.Popen(args, cwd=cwd, env=env)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError(f"Server did not start within {timeout} seconds")
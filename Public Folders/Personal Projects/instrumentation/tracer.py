@@ -0,0 +1,365 @@
+"""
+tracer.py
+Stage timers and memory samples recorded as Chrome trace events.
+
+Events are kept in memory in a bounded buffer and written as a single JSON file in
+the Trace Event Format, which chrome://tracing, Perfetto (ui.perfetto.dev) and
+speedscope can open. Nothing is recorded unless a tracer is enabled, either through
+the ``PROFILE_TRACE`` environment variable when this module is imported or by
+calling ``enable()``.
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+
+# Environment switches read once at import time
+TRACE_ENV = "PROFILE_TRACE"
+MEMORY_ENV = "PROFILE_MEMORY"
+MAX_EVENTS_ENV = "PROFILE_MAX_EVENTS"
+
+# Oldest events are dropped past this many, so long-running servers stay bounded
+DEFAULT_MAX_EVENTS = 1_000_000
+
+MEMORY_MODES = (None, 'rss', 'python')
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+# Shared no-op context manager handed out by stage() while tracing is off
+_NULL_STAGE = nullcontext()
+
+_tracer = None
+
+
+def _rss_bytes():
+    """
+    Reads the resident set size of the current process.
+
+    Returns:
+        int: Resident memory in bytes. Where /proc is not available (macOS) this is
+        the peak resident size reported by getrusage.
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Tracer:
+    """
+    Collects trace events for one process.
+
+    Args:
+        path (str): File the trace is written to. ``{pid}`` is replaced by the process id.
+        memory (str): None for timings only, ``'rss'`` to sample the resident set size
+            or ``'python'`` to sample the memory traced by tracemalloc around each stage.
+        max_events (int): Size of the event buffer.
+    """
+    def __init__(self, path, memory=None, max_events=DEFAULT_MAX_EVENTS):
+        if memory not in MEMORY_MODES:
+            raise ValueError(f"memory must be one of {MEMORY_MODES}, got {memory!r}")
+        self.path = path
+        self.memory = memory
+        self.pid = os.getpid()
+        self.events = deque(maxlen=max_events)
+        self.thread_names = {}
+        self._origin = time.perf_counter_ns()
+        if memory == 'python' and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def now(self):
+        """
+        Returns:
+            float: Microseconds since the tracer was created, the trace time base.
+        """
+        return (time.perf_counter_ns() - self._origin) / 1000
+
+    def thread_id(self):
+        """
+        Returns the native id of the calling thread, remembering its name for the
+        trace metadata.
+
+        Returns:
+            int: The thread id.
+        """
+        tid = threading.get_native_id()
+        if tid not in self.thread_names:
+            self.thread_names[tid] = threading.current_thread().name
+        return tid
+
+    def memory_bytes(self):
+        """
+        Returns:
+            int: The current memory sample for the configured mode.
+        """
+        if self.memory == 'python':
+            return tracemalloc.get_traced_memory()[0]
+        return _rss_bytes()
+
+    def complete(self, name, category, start, end, args=None):
+        """
+        Records a finished stage as a complete ('X') event.
+
+        Args:
+            name (str): Stage name.
+            category (str): Event category, used for filtering in the viewer.
+            start (float): Start time from now().
+            end (float): End time from now().
+            args (dict): Extra values shown with the event.
+        """
+        event = {'ph': 'X', 'name': name, 'cat': category, 'ts': start, 'dur': end - start,
+                 'pid': self.pid, 'tid': self.thread_id()}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def counter(self, name, values):
+        """
+        Records a counter ('C') event, drawn as a track of values over time.
+
+        Args:
+            name (str): Counter name.
+            values (dict): Series name to numeric value.
+        """
+        self.events.append({'ph': 'C', 'name': name, 'ts': self.now(), 'pid': self.pid,
+                            'tid': self.thread_id(), 'args': values})
+
+    def write(self, path=None):
+        """
+        Writes the recorded events as a Trace Event Format JSON file.
+
+        Args:
+            path (str): Destination, defaults to the tracer's path.
+
+        Returns:
+            str: The path written.
+        """
+        path = (path or self.path).replace('{pid}', str(self.pid))
+        metadata = [{'ph': 'M', 'name': 'process_name', 'pid': self.pid, 'tid': 0,
+                     'args': {'name': os.path.basename(sys.argv[0]) or 'python'}}]
+        metadata += [{'ph': 'M', 'name': 'thread_name', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                     for tid, name in list(self.thread_names.items())]
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'traceEvents': metadata + list(self.events), 'displayTimeUnit': 'ms'}, f)
+        os.replace(tmp_path, path)
+        return path
+
+
+class _Stage:
+    """
+    Times one block of code on a tracer, sampling memory around it when enabled.
+    """
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start', 'memory_before')
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        if self.tracer.memory:
+            self.memory_before = self.tracer.memory_bytes()
+        self.start = self.tracer.now()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        tracer = self.tracer
+        end = tracer.now()
+        args = dict(self.args) if self.args else {}
+        if exc_type is not None:
+            args['error'] = exc_type.__name__
+        if tracer.memory:
+            memory_after = tracer.memory_bytes()
+            args['memory_delta'] = memory_after - self.memory_before
+            tracer.counter('memory', {tracer.memory: memory_after})
+        tracer.complete(self.name, self.category, self.start, end, args)
+        return False
+
+
+def enable(path, memory=None, max_events=DEFAULT_MAX_EVENTS):
+    """
+    Starts recording into a new tracer. Only functions decorated after this call
+    are instrumented.
+
+    Args:
+        path (str): File the trace is written to at exit or by write_trace().
+        memory (str): None, ``'rss'`` or ``'python'``, see Tracer.
+        max_events (int): Size of the event buffer.
+
+    Returns:
+        Tracer: The active tracer.
+    """
+    global _tracer
+    _tracer = Tracer(path, memory, max_events)
+    return _tracer
+
+
+def disable():
+    """
+    Stops recording. Events recorded so far are discarded unless written first.
+    """
+    global _tracer
+    _tracer = None
+
+
+def enabled():
+    """
+    Returns:
+        bool: True while a tracer is recording.
+    """
+    return _tracer is not None
+
+
+def stage(name, category='stage', **args):
+    """
+    Context manager timing the enclosed block as one trace event.
+
+    While tracing is off this returns a shared no-op context manager.
+
+    Args:
+        name (str): Stage name shown in the trace viewer.
+        category (str): Event category.
+        **args: Extra values attached to the event, e.g. a batch size.
+
+    Returns:
+        A context manager.
+    """
+    if _tracer is None:
+        return _NULL_STAGE
+    return _Stage(_tracer, name, category, args)
+
+
+def profiled(name=None, category=None):
+    """
+    Decorator timing every call of a function as a trace event.
+
+    Can be used bare (``@profiled``) or with arguments (``@profiled("predict")``).
+    Whether tracing is on is decided when the function is decorated: while it is
+    off the function is returned unchanged, so disabled hooks cost nothing per call.
+
+    Args:
+        name (str): Stage name, defaults to the function's qualified name.
+        category (str): Event category, defaults to the function's module.
+
+    Returns:
+        The decorated function.
+    """
+    if callable(name):
+        return profiled()(name)
+
+    def decorate(fn):
+        tracer = _tracer
+        if tracer is None:
+            return fn
+        label = name or fn.__qualname__
+        event_category = category or fn.__module__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Stage(tracer, label, event_category, None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def sample_memory(name='memory'):
+    """
+    Records the current memory use as a counter event. Uses the tracer's memory
+    mode, or the resident set size when memory sampling is off.
+
+    Args:
+        name (str): Counter name.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return
+    if tracer.memory:
+        tracer.counter(name, {tracer.memory: tracer.memory_bytes()})
+    else:
+        tracer.counter(name, {'rss': _rss_bytes()})
+
+
+def write_trace(path=None):
+    """
+    Writes the events recorded so far.
+
+    Args:
+        path (str): Destination, defaults to the path the tracer was enabled with.
+
+    Returns:
+        str: The path written, or None while tracing is off.
+    """
+    if _tracer is None:
+        return None
+    return _tracer.write(path)
+
+
+def _write_at_exit():
+    if _tracer is None:
+        return
+    try:
+        print(f"Profiling trace written to {_tracer.write()}")
+    except OSError as e:
+        print(f"Could not write profiling trace: {e}")
+
+
+def _memory_mode(value):
+    """
+    Parses ``PROFILE_MEMORY``. An unknown value is reported and treated as off, so a
+    typo in a debug switch never stops an instrumented service from starting.
+    """
+    value = (value or '').strip().lower()
+    if value in ('', '0', 'off'):
+        return None
+    if value == '1':
+        return 'rss'
+    if value not in MEMORY_MODES:
+        print(f"Ignoring {MEMORY_ENV}={value!r}, expected rss, python or 1; recording timings only",
+              file=sys.stderr)
+        return None
+    return value
+
+
+def _max_events(value):
+    """
+    Parses ``PROFILE_MAX_EVENTS``, falling back to the default on an invalid value.
+    """
+    try:
+        max_events = int(value) if value else DEFAULT_MAX_EVENTS
+    except ValueError:
+        max_events = 0
+    if max_events < 1:
+        print(f"Ignoring {MAX_EVENTS_ENV}={value!r}, expected a positive integer; "
+              f"keeping {DEFAULT_MAX_EVENTS} events", file=sys.stderr)
+        return DEFAULT_MAX_EVENTS
+    return max_events
+
+
+if os.environ.get(TRACE_ENV):
+    enable(os.environ[TRACE_ENV], _memory_mode(os.environ.get(MEMORY_ENV)),
+           _max_events(os.environ.get(MAX_EVENTS_ENV)))
+
+atexit.register(_write_at_exit)